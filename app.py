@@ -3,10 +3,17 @@ import streamlit as st
 import pandas as pd
 import pdfkit
 from modules import (
-    parser, preprocessing, skill_extraction, ner_extraction, highlight,
-    matching, ranking, dashboard, job_analysis, semantic, experience_level, report
+    preprocessing, dashboard, job_analysis, semantic, features, models, multi_job, instrumentation
 )
-from modules.report import generate_full_report
+from modules.background_ingest import IngestJobs
+from modules.candidate_store import CandidateStore, job_key, text_hash
+from modules.export import export_highlighted
+from modules.feature_cache import FeatureCache, file_digest
+from modules.scoring import ResumeFeatureTable
+from config import ensure_dirs, METRICS_ENABLED, HIGHLIGHT_DIR, REPORTS_DIR
+from modules.report import start_full_report
+
+ensure_dirs()
 
 # ---------------- PDFKit Configuration ----------------
 config = pdfkit.configuration(wkhtmltopdf="/usr/local/bin/wkhtmltopdf")
@@ -22,6 +29,17 @@ experience_filter = st.sidebar.slider("Years of Experience", 0, 20, (0, 20))
 education_options = ["B.Tech", "M.Tech", "PhD", "M.Sc", "B.Sc"]
 selected_education = st.sidebar.multiselect("Education", education_options)
 
+# Each session records into its own metrics registry
+instrumentation.activate(st.session_state.setdefault("metrics", instrumentation.Registry()))
+with st.sidebar.expander("Performance"):
+    collect_metrics = st.checkbox("Collect performance metrics", value=METRICS_ENABLED)
+    profile_batch = st.checkbox(
+        "Profile new uploads (cProfile)", value=False,
+        help="Processes new uploads on a single thread so the profile covers parsing, spaCy and the encoder. "
+             "Implies collecting performance metrics."
+    )
+    instrumentation.enable(collect_metrics or profile_batch)
+
 # ---------------- Job Description Inputs ----------------
 job_desc = st.text_area("Paste Job Description Here", height=150)
 job_skills_input = st.text_input("Enter key skills (comma-separated)")
@@ -31,66 +49,166 @@ uploaded_files = st.file_uploader(
 )
 
 # ---------------- Tabs ----------------
-tabs = st.tabs(["Candidate List", "Resume Preview", "Analytics Dashboard", "Skill Gap Heatmap", "Export / Reports"])
+tabs = st.tabs([
+    "Candidate List", "Resume Preview", "Analytics Dashboard", "Skill Gap Heatmap", "Export / Reports",
+    "Multi-Job Matching", "Performance"
+])
+
+# Candidates, features and scores of every session, on the SQLite store
+if "candidate_store" not in st.session_state:
+    st.session_state["candidate_store"] = CandidateStore()
+candidate_store = st.session_state["candidate_store"]
 
 # ---------------- Live Resume Processing ----------------
+@st.cache_resource(show_spinner="Loading NLP models...")
+def warm_up_models():
+    """Runs models.warm_up() once per server process, not on every rerun."""
+    models.warm_up()
+    return True
+
 if uploaded_files and job_desc.strip() and job_skills_input.strip():
+    warm_up_models()
+
     job_desc_processed = preprocessing.preprocess_text(job_desc)
     job_skills_list = [skill.strip().lower() for skill in job_skills_input.split(",")]
 
-    results = []
-
-    for uploaded_file in uploaded_files:
-        try:
-            # Extract text
-            resume_text = parser.extract_text(uploaded_file)
-            resume_processed = preprocessing.preprocess_text(resume_text)
-
-            # Extract details
-            ner_info = ner_extraction.extract_ner_details(resume_text)
-            skills_found = skill_extraction.extract_skills(resume_text)
-            skills_dict = {skill.lower(): 1.0 if skill.lower() in job_skills_list else 0.5 for skill in skills_found}
-
-            # Compute scores
-            score = matching.compute_weighted_score(resume_processed, job_desc_processed, skills_found, job_skills_list)
-            semantic_score = semantic.compute_semantic_score(resume_text, job_desc)
-            final_score = round(0.7 * score + 0.3 * semantic_score, 2)
-
-            # Experience
-            experience = float(ner_info.get('experience') or 0)
-            exp_level = experience_level.detect_experience_level(experience)
-
-            # Highlighted resume
-            highlighted_resume = highlight.highlight_skills_intensity(resume_text, skills_dict)
-
-            # Append results
-            results.append({
-                "Filename": uploaded_file.name,
-                "Score": final_score,
-                "Skills Found": ", ".join(skills_found),
-                "Highlighted Resume": highlighted_resume,
-                "Experience Level": exp_level,
-                **ner_info
-            })
-
-        except Exception as e:
-            st.warning(f"Failed to process {uploaded_file.name}: {e}")
-
-    # ---------------- DataFrame & Filtering ----------------
-    df = pd.DataFrame(results)
+    # Job-independent features, kept in session state and cached on disk by
+    # the file's content hash. Uploads not seen before are parsed and analysed
+    # by background IngestJobs (on the ingestion process pool); each run of
+    # the script picks up whatever they have finished so far.
+    upload_digests = st.session_state.setdefault("upload_digests", {})
+    resume_features = st.session_state.setdefault("resume_features", {})
+    ingest_failed = st.session_state.setdefault("ingest_failed", {})  # key -> (name, error)
+    ingest_cancelled = st.session_state.setdefault("ingest_cancelled", set())
+    feature_cache = FeatureCache(version=features.feature_version())
+
+    ingest_jobs = st.session_state.setdefault("ingest_jobs", IngestJobs())
+    new_features, failures, job_errors = ingest_jobs.collect()
+    resume_features.update(new_features)
+    ingest_failed.update((key, (name, error)) for key, name, error in failures)
+    for error in job_errors:
+        st.warning(f"Background ingestion stopped: {error}")
+
+    upload_ids = [(f.name, f.size, getattr(f, "file_id", None)) for f in uploaded_files]
+    for upload_id, uploaded_file in zip(upload_ids, uploaded_files):
+        if upload_id not in upload_digests:
+            upload_digests[upload_id] = file_digest(uploaded_file.getvalue())
+    upload_keys = [upload_digests[upload_id] for upload_id in upload_ids]
+
+    # Session state only keeps the current uploads; removed ones stay in the feature cache on disk
+    current_ids, current_keys = set(upload_ids), set(upload_keys)
+    for stale_id in [upload_id for upload_id in upload_digests if upload_id not in current_ids]:
+        del upload_digests[stale_id]
+    for session_dict in (resume_features, ingest_failed):
+        for stale_key in [key for key in session_dict if key not in current_keys]:
+            del session_dict[stale_key]
+
+    missing_uploads, missing_keys = [], set()
+    for uploaded_file, cache_key in zip(uploaded_files, upload_keys):
+        if (cache_key in resume_features or cache_key in ingest_failed or cache_key in ingest_cancelled
+                or cache_key in missing_keys or cache_key in ingest_jobs):
+            continue
+        cached = feature_cache.get(cache_key)
+        if cached is None:
+            missing_uploads.append((cache_key, uploaded_file))
+            missing_keys.add(cache_key)
+        else:
+            resume_features[cache_key] = cached
+
+    if missing_uploads:
+        ingest_jobs.add([(cache_key, f.name, f.getvalue()) for cache_key, f in missing_uploads],
+                        workers=1 if profile_batch else None, profile=profile_batch)
+    ingesting = ingest_jobs.running
+
+    for name, error in ingest_failed.values():
+        st.warning(f"Failed to process {name}: {error}")
+    if ingest_jobs.duplicates:
+        tabs[0].caption(f"{ingest_jobs.duplicates} new uploads were duplicates or near-duplicates of resumes "
+                        f"already processed and reused their features.")
+
+    # ---------------- Ingestion Progress ----------------
+    if ingesting:
+        with tabs[0]:
+            @st.fragment(run_every=1.0)
+            def ingest_status():
+                # Rerun the page (scoring, filters, tabs) whenever new resumes are ready
+                if ingest_jobs.has_results():
+                    st.rerun()
+                finished, total = ingest_jobs.progress()
+                st.progress(finished / max(total, 1), text=f"Processed {finished}/{total} new resumes...")
+            ingest_status()
+
+            pending = ingest_jobs.pending_names()
+            prioritized = st.multiselect("Process next", list(pending), format_func=pending.get,
+                                         help="Move these resumes to the front of the queue.")
+            col_prioritize, col_cancel = st.columns(2)
+            if col_prioritize.button("Prioritize", disabled=not prioritized):
+                ingest_jobs.prioritize(prioritized)
+            if col_cancel.button("Cancel remaining"):
+                ingest_cancelled.update(pending)
+                ingest_jobs.cancel()
+    elif ingest_cancelled.intersection(upload_keys):
+        with tabs[0]:
+            if st.button(f"Process {len(ingest_cancelled.intersection(upload_keys))} cancelled uploads"):
+                ingest_cancelled.clear()
+                st.rerun()
+
+    # Embed only resumes without a cached embedding
+    missing_embeddings = [key for key in set(upload_keys) if key in resume_features
+                          and resume_features[key].get("embedding") is None]
+    if missing_embeddings:
+        new_embeddings = semantic.encode_texts([resume_features[key]["text"] for key in missing_embeddings])
+        for cache_key, embedding in zip(missing_embeddings, new_embeddings):
+            resume_features[cache_key]["embedding"] = embedding
+            feature_cache.put_embedding(cache_key, embedding)
+
+    # Feature table, rebuilt only when the set of processed uploads changes
+    table_rows = [(f.name, key) for f, key in zip(uploaded_files, upload_keys) if key in resume_features]
+    if st.session_state.get("resume_table_rows") != table_rows:
+        st.session_state["resume_table"] = (
+            ResumeFeatureTable([name for name, _ in table_rows], [resume_features[key] for _, key in table_rows])
+            if table_rows else None
+        )
+        st.session_state["resume_table_rows"] = table_rows
+    resume_table = st.session_state["resume_table"]
+
+    # Persist new candidates to the SQLite candidate store, once per set of uploads
+    if not ingesting and st.session_state.get("stored_rows") != table_rows:
+        row_hashes = [text_hash(resume_features[key]["text"]) for _, key in table_rows]
+        known = candidate_store.known_hashes(row_hashes)
+        candidate_store.add_candidates(
+            {"filename": name, "content_hash": content_hash, "features": resume_features[key]}
+            for (name, key), content_hash in zip(table_rows, row_hashes) if content_hash not in known
+        )
+        st.session_state["stored_rows"] = table_rows
+        st.session_state["stored_hashes"] = row_hashes
+
+    # ---------------- Scoring & Filtering ----------------
+    # Only this part depends on the job description, key skills and filters
+    with instrumentation.span("scoring"):
+        df = resume_table.score(job_desc, job_desc_processed, job_skills_list) if resume_table else pd.DataFrame()
+    job_id = st.session_state["current_job_id"] = job_key(job_desc, job_skills_list)
+    if not df.empty and not ingesting and st.session_state.get("stored_scores") != (job_id, table_rows):
+        candidate_store.add_scores(job_id, zip(st.session_state["stored_hashes"], df['Score']),
+                                   job_name=job_desc.strip().splitlines()[0][:80], job_skills=job_skills_list)
+        st.session_state["stored_scores"] = (job_id, table_rows)
+
     if not df.empty:
-        df['experience'] = df['experience'].fillna(0).astype(float)
+        # df's index is the feature table row, so all masks line up with the table
         df_filtered = df[
             (df['Score'] >= min_score) &
             (df['experience'] >= experience_filter[0]) &
-            (df['experience'] <= experience_filter[1])
+            (df['experience'] <= experience_filter[1]) &
+            resume_table.education_mask(selected_education)
         ]
-        if selected_education:
-            df_filtered = df_filtered[
-                df_filtered['education'].str.contains('|'.join(selected_education), case=False, na=False)
-            ]
 
-        df_ranked = df_filtered.sort_values(by='Score', ascending=False).reset_index(drop=True)
+        df_ranked = df_filtered.sort_values(by='Score', ascending=False)
+        ranked_rows = df_ranked.index.to_numpy()
+        # Highlighting depends on the key skills, so it is done only for the ranked rows
+        df_ranked.insert(3, "Highlighted Resume", [
+            resume_table.highlighted(row, job_skills_list) for row in ranked_rows
+        ])
+        df_ranked = df_ranked.reset_index(drop=True)
 
         # ---------------- Candidate List Tab ----------------
         with tabs[0]:
@@ -115,57 +233,135 @@ if uploaded_files and job_desc.strip() and job_skills_input.strip():
         # ---------------- Analytics Dashboard Tab ----------------
         with tabs[2]:
             st.subheader("Analytics Dashboard")
-            dashboard.show_dashboard(df_ranked)
+            dashboard.show_dashboard(df_ranked, skill_counts=resume_table.skill_counts(ranked_rows))
 
         # ---------------- Skill Gap Heatmap Tab ----------------
         with tabs[3]:
             st.subheader("Candidate vs Job Skills Heatmap")
-            job_analysis.show_skill_gap_heatmap(df_ranked, job_skills_list)
+            job_analysis.show_skill_gap_heatmap(
+                df_ranked, job_skills_list, presence=resume_table.skill_presence(job_skills_list, ranked_rows)
+            )
 
         # ---------------- Export / Reports Tab ----------------
         with tabs[4]:
             st.subheader("Export Results")
 
-            # Create output directories
-            highlight_dir = "data/highlighted_resumes"
-            report_dir = "data/reports"
-            os.makedirs(highlight_dir, exist_ok=True)
-            os.makedirs(report_dir, exist_ok=True)
+            os.makedirs(REPORTS_DIR, exist_ok=True)
 
             # CSV export
             csv = df_ranked.drop(columns=['Highlighted Resume']).to_csv(index=False).encode('utf-8')
             st.download_button("Download Ranked Candidates as CSV", csv, "ranked_candidates.csv", "text/csv")
 
-            # Export highlighted resumes
-            for idx, row in df_ranked.iterrows():
-                safe_name = row['Filename'].replace(" ", "_").replace(".pdf", "").replace(".docx", "")
-                html_filename = os.path.join(highlight_dir, f"{safe_name}_highlighted.html")
-                pdf_filename = os.path.join(highlight_dir, f"{safe_name}_highlighted.pdf")
-                
-                with open(html_filename, "w", encoding="utf-8") as f:
-                    f.write(row['Highlighted Resume'])
-                try:
-                    pdfkit.from_file(html_filename, pdf_filename, configuration=config)
-                except Exception:
-                    st.warning(f"PDF export failed for {row['Filename']}. Ensure wkhtmltopdf is installed.")
-
-            st.success("Highlighted resumes exported as HTML and PDF in 'data/highlighted_resumes/'")
+            # Export highlighted resumes (only on request; unchanged files are skipped)
+            export_pdf = st.checkbox("Also convert to PDF", value=True)
+            if st.button("Export Highlighted Resumes"):
+                export_progress = st.progress(0.0, text="Writing HTML...")
+                result = export_highlighted(
+                    zip(df_ranked['Filename'], df_ranked['Highlighted Resume']),
+                    pdf=export_pdf,
+                    configuration=config,
+                    progress=lambda done, total: export_progress.progress(
+                        done / total, text=f"Converted {done}/{total} PDFs"
+                    )
+                )
+                export_progress.progress(1.0, text="Done")
+                st.success(
+                    f"Exported {len(result.written)} resumes to '{HIGHLIGHT_DIR}' "
+                    f"({len(result.unchanged)} unchanged, skipped)"
+                )
+                for filename, error in result.failed:
+                    st.warning(f"PDF export failed for {filename}. Ensure wkhtmltopdf is installed. ({error})")
 
-            # Full PDF report
+            # Full PDF report: the HTML is written here, the PDF conversion runs in the background
             if st.button("Generate Full Report"):
                 try:
-                    report_path = os.path.join(report_dir, "Full_Resume_Report.pdf")
-                    generate_full_report(df_ranked, job_skills_list, report_name=report_path)
-                    st.success(f"Full report generated: {report_path}")
-                    st.download_button(
-                        "Download Full Report PDF",
-                        open(report_path, "rb").read(),
-                        file_name="Full_Resume_Report.pdf"
+                    report_path = os.path.join(REPORTS_DIR, "Full_Resume_Report.pdf")
+                    st.session_state["report_job"] = start_full_report(
+                        df_ranked, job_skills_list, report_name=report_path, configuration=config
                     )
                 except Exception as e:
                     st.warning(f"Full report generation failed: {e}")
 
-    else:
+            report_job = st.session_state.get("report_job")
+            if report_job is not None and not report_job.done:
+                @st.fragment(run_every=1.0)
+                def report_status():
+                    if report_job.done:
+                        st.rerun()
+                    st.info("Converting the full report to PDF in the background...")
+                report_status()
+            elif report_job is not None and report_job.error:
+                st.warning(f"Full report generation failed: {report_job.error}")
+            elif report_job is not None:
+                st.success(f"Full report generated: {report_job.pdf_path}")
+                with open(report_job.pdf_path, "rb") as f:
+                    st.download_button("Download Full Report PDF", f.read(), file_name="Full_Resume_Report.pdf")
+
+        # ---------------- Multi-Job Matching Tab ----------------
+        with tabs[5]:
+            st.subheader("Screen Candidates Against Multiple Jobs")
+            job_files = st.file_uploader(
+                "Upload Job Descriptions (TXT)", accept_multiple_files=True, type=['txt'], key="job_uploader"
+            )
+            top_k = st.number_input("Top candidates per job", 1, 50, 5)
+            if job_files:
+                # Key skills of each job are the skills found in its description
+                jobs = multi_job.prepare_jobs(
+                    (f.name, f.getvalue().decode("utf-8", errors="ignore"), None) for f in job_files
+                )
+                job_matches = multi_job.match_jobs(resume_table, jobs, top_k=int(top_k))
+                st.dataframe(pd.DataFrame(
+                    job_matches.scores, index=[job.name for job in jobs], columns=resume_table.names
+                ), width='stretch')
+                for job in jobs:
+                    with st.expander(f"{job.name} (skills: {', '.join(job.skills) or 'none found'})"):
+                        st.dataframe(pd.DataFrame(
+                            [(resume_table.names[row], score) for row, score in job_matches.top[job.name]],
+                            columns=["Filename", "Score"]
+                        ), width='stretch')
+
+    elif not ingesting:
         st.warning("No resumes processed successfully yet.")
 else:
     st.info("Upload resumes, enter job description & skills to see live scoring.")
+
+# ---------------- Stored Candidate Pool ----------------
+# Needs no uploads: the sidebar filters and top-K run in SQL over every stored candidate
+with tabs[0]:
+    with st.expander(f"Stored candidate pool ({candidate_store.count()} candidates)", expanded=not uploaded_files):
+        stored_jobs = candidate_store.jobs()
+        job_labels = {None: "All candidates (newest first)"}
+        job_labels.update(
+            (job.id, f"{job.name or job.id[:12]} ({job.candidates} scored)") for job in stored_jobs.itertuples()
+        )
+        current_job = st.session_state.get("current_job_id")
+        stored_job = st.selectbox(
+            "Job", list(job_labels), format_func=job_labels.get,
+            index=list(job_labels).index(current_job) if current_job in job_labels else 0
+        )
+        stored_limit = st.number_input("Rows", 10, 1000, 100, step=10)
+        st.dataframe(candidate_store.query(
+            stored_job, min_score=min_score, experience=experience_filter,
+            education=selected_education, limit=int(stored_limit)
+        ).drop(columns=['candidate_id']), width='stretch')
+
+# ---------------- Performance Tab ----------------
+with tabs[6]:
+    st.subheader("Stage Timings & Counters")
+    if not instrumentation.is_enabled():
+        st.info("Enable 'Collect performance metrics' in the sidebar to record stage timings.")
+    metrics = instrumentation.snapshot()
+    if metrics["spans"]:
+        spans_df = pd.DataFrame.from_dict(metrics["spans"], orient="index").rename_axis("Stage")
+        st.dataframe(spans_df.sort_values("total_s", ascending=False).round(3), width='stretch')
+    if metrics["counters"]:
+        st.dataframe(pd.Series(metrics["counters"], name="Value").rename_axis("Counter"), width='stretch')
+    last_profile = instrumentation.registry().last_profile
+    if last_profile:
+        with st.expander("Last profiled batch (top functions by cumulative time)"):
+            st.code(last_profile)
+    if instrumentation.is_enabled() and (metrics["spans"] or metrics["counters"]):
+        prom_path, json_path = instrumentation.export()
+        st.caption(f"Exported to {prom_path} and {json_path}")
+    if st.button("Reset metrics"):
+        instrumentation.reset()
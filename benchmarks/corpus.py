@@ -0,0 +1,108 @@
+# benchmarks/corpus.py
+"""
+Deterministic synthetic resumes as PDF and DOCX files.
+
+    python -m benchmarks.corpus data/benchmarks/corpus -n 1000 --pages 3 --skill-density 0.05
+
+The same (index, seed, pages, skill density) always produces the same
+text, so benchmark runs on different commits parse identical inputs.
+"""
+import argparse
+import os
+import random
+
+from config import SKILLS_KEYWORDS
+from modules.skill_extraction import SKILLS_DB
+
+FIRST_NAMES = ["John", "Priya", "Wei", "Maria", "Ahmed", "Olga", "Kofi", "Lucia", "Kenji", "Sara"]
+LAST_NAMES = ["Smith", "Sharma", "Chen", "Garcia", "Hassan", "Ivanova", "Mensah", "Rossi", "Tanaka", "Cohen"]
+DEGREES = ["B.Tech in Computer Science", "M.Sc in Data Science", "B.Sc in Mathematics", "MBA", "PhD in Physics"]
+FILLER = (
+    "designed built maintained deployed reviewed improved migrated automated tested documented "
+    "services pipelines dashboards reports systems teams customers releases features platforms "
+    "across with using for the a of and to in on large scale reliable internal external quarterly"
+).split()
+WORDS_PER_PAGE = 450
+SKILLS = list(dict.fromkeys(SKILLS_DB + [skill.lower() for skill in SKILLS_KEYWORDS]))
+
+def resume_text(index, pages=2, skill_density=0.03, seed=0):
+    """
+    Text of synthetic resume `index`: a header with name and contacts,
+    education, experience, then `pages` pages of work history where about
+    `skill_density` of the words are skills.
+    """
+    rng = random.Random(f"{seed}-{index}")
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}{index}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "",
+        "Education",
+        rng.choice(DEGREES),
+        "",
+        "Experience",
+        f"{rng.randint(0, 15)} years of experience",
+        "",
+    ]
+    for _ in range(pages):
+        words = []
+        for _ in range(WORDS_PER_PAGE):
+            words.append(rng.choice(SKILLS) if rng.random() < skill_density else rng.choice(FILLER))
+        # ~8 words per line (fits the page width at 9pt)
+        lines.extend(" ".join(words[i:i + 8]) for i in range(0, len(words), 8))
+    return "\n".join(lines)
+
+def write_pdf(text, path, lines_per_page=50):
+    import pymupdf
+    doc = pymupdf.open()
+    lines = text.split("\n")
+    for start in range(0, len(lines), lines_per_page):
+        page = doc.new_page()
+        page.insert_text((50, 50), "\n".join(lines[start:start + lines_per_page]), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+def write_docx(text, path):
+    from docx import Document
+    doc = Document()
+    for line in text.split("\n"):
+        doc.add_paragraph(line)
+    doc.save(path)
+
+WRITERS = {"pdf": write_pdf, "docx": write_docx}
+
+def generate_corpus(out_dir, n, pages=2, skill_density=0.03, formats=("pdf", "docx"), seed=0):
+    """
+    Writes resumes 0..n-1 to out_dir, alternating between `formats`, and
+    returns their paths. Files that already exist are kept, so growing a
+    corpus only writes the new ones.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for index in range(n):
+        ext = formats[index % len(formats)]
+        path = os.path.join(out_dir, f"resume_{index:06d}.{ext}")
+        if not os.path.exists(path):
+            WRITERS[ext](resume_text(index, pages, skill_density, seed), path)
+        paths.append(path)
+    return paths
+
+def corpus_dir(root, pages, skill_density, seed):
+    """Directory for one corpus configuration under `root`."""
+    return os.path.join(root, f"corpus-p{pages}-d{skill_density:g}-s{seed}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir")
+    parser.add_argument("-n", type=int, default=100, help="number of resumes")
+    parser.add_argument("--pages", type=int, default=2, help="pages of work history per resume")
+    parser.add_argument("--skill-density", type=float, default=0.03, help="fraction of words that are skills")
+    parser.add_argument("--formats", default="pdf,docx", help="comma-separated: pdf, docx")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    paths = generate_corpus(args.out_dir, args.n, args.pages, args.skill_density,
+                            tuple(args.formats.split(",")), args.seed)
+    print(f"[INFO] {len(paths)} resumes in {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
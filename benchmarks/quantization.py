@@ -0,0 +1,107 @@
+# benchmarks/quantization.py
+"""
+Memory and recall of quantized embedding storage against exact float32
+search.
+
+    python -m benchmarks.quantization --rows 200000 --queries 200
+    python -m benchmarks.quantization --store data/embeddings
+
+Without --store, a synthetic clustered pool of unit vectors is used
+(resume embeddings are far from uniformly spread, so purely random
+vectors would make the ranking too easy).
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from config import EMBEDDING_DIM, RERANK_DEPTH, TOP_N_MATCHES
+from modules.quantization import KINDS, QuantizedMatrix
+from modules.retrieval import exact_search, top_k
+
+def synthetic_vectors(n_rows, dim=EMBEDDING_DIM, n_clusters=200, spread=0.6, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(n_clusters, size=n_rows)]
+    vectors += spread * rng.standard_normal((n_rows, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def recall(exact_rows, approx_rows):
+    return len(np.intersect1d(exact_rows, approx_rows)) / max(len(exact_rows), 1)
+
+def run(vectors, queries, k, rerank):
+    exact_start = time.perf_counter()
+    exact = [exact_search(vectors, query, k)[0] for query in queries]
+    exact_ms = 1000 * (time.perf_counter() - exact_start) / len(queries)
+
+    results = [{
+        "storage": "float32",
+        "bytes": int(vectors.nbytes),
+        "bytes_per_vector": vectors.nbytes / len(vectors),
+        "compression": 1.0,
+        f"recall@{k}": 1.0,
+        "ms_per_query": round(exact_ms, 3),
+    }]
+    for kind in KINDS:
+        matrix = QuantizedMatrix.build(vectors, kind)
+        no_rerank, reranked = [], []
+        start = time.perf_counter()
+        for query, exact_rows in zip(queries, exact):
+            reranked.append(recall(exact_rows, matrix.search(vectors, query, k, rerank=rerank)[0]))
+        elapsed_ms = 1000 * (time.perf_counter() - start) / len(queries)
+        for query, exact_rows in zip(queries, exact):
+            no_rerank.append(recall(exact_rows, top_k(matrix.scores(query), k)))
+        results.append({
+            "storage": kind,
+            "bytes": int(matrix.nbytes),
+            "bytes_per_vector": matrix.nbytes / len(vectors),
+            "compression": round(vectors.nbytes / matrix.nbytes, 2),
+            f"recall@{k}": round(float(np.mean(reranked)), 4),
+            f"recall@{k}_without_rerank": round(float(np.mean(no_rerank)), 4),
+            "ms_per_query": round(elapsed_ms, 3),
+        })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic pool size")
+    parser.add_argument("--store", help="benchmark an existing EmbeddingStore directory instead")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=TOP_N_MATCHES)
+    parser.add_argument("--rerank", type=int, default=RERANK_DEPTH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed + 1)
+    if args.store:
+        from modules.embedding_store import EmbeddingStore
+        store = EmbeddingStore(args.store)
+        vectors = np.asarray(store.vectors[store.live_mask])
+    else:
+        vectors = synthetic_vectors(args.rows, seed=args.seed)
+    # Queries are perturbed pool members, so each has real near neighbours
+    queries = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+    queries = queries + 0.5 * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(queries.shape[1])
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    report = {
+        "rows": len(vectors),
+        "dim": vectors.shape[1],
+        "queries": len(queries),
+        "k": args.k,
+        "rerank": args.rerank,
+        "results": run(vectors, queries, args.k, args.rerank),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# benchmarks/stages.py
+"""
+Times each stage of the resume pipeline separately on synthetic corpora
+of growing size and writes the results to a JSON file.
+
+    python -m benchmarks.stages --sizes 10,100,1000,10000 -o bench.json
+    python -m benchmarks.stages --sizes 10,100 --compare bench_main.json
+
+For every corpus size and stage the output has the number of calls,
+throughput, latency percentiles (p50 / p90 / p99) and the peak Python
+heap allocated during the stage (tracemalloc, measured in a separate
+pass so it does not slow down the timed one). --compare prints the
+p50 and throughput ratios against an earlier results file.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_DIR
+from benchmarks.corpus import corpus_dir, generate_corpus
+
+JOB_DESCRIPTION = (
+    "We are hiring a backend engineer with strong Python and SQL skills, experience with "
+    "machine learning pipelines, Docker and AWS, and a degree in computer science."
+)
+JOB_SKILLS = ["python", "sql", "machine learning", "docker", "aws"]
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return None
+
+def summarize(latencies, total, peak_bytes):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "calls": len(latencies),
+        "total_s": round(total, 4),
+        "throughput_per_s": round(len(latencies) / total, 2) if total > 0 else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p90_ms": round(float(np.percentile(latencies, 90)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "peak_mb": None if peak_bytes is None else round(peak_bytes / 2**20, 2),
+    }
+
+def _full_report(df, job_skills, report_path):
+    """report.generate_full_report, returning the finished ReportJob so its error can be recorded."""
+    from modules import report
+    job = report.start_full_report(df, job_skills, report_name=report_path)
+    job.wait()
+    return job
+
+def time_stage(fn, inputs, memory=True, reset=None):
+    """
+    Calls fn(*args) for every args tuple in inputs. Returns (outputs, summary).
+    reset() runs before each pass (e.g. to clear a cache the stage fills).
+    """
+    if reset:
+        reset()
+    outputs, latencies = [], []
+    start = time.perf_counter()
+    for args in inputs:
+        t0 = time.perf_counter()
+        outputs.append(fn(*args))
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        if reset:
+            reset()
+        tracemalloc.start()
+        for args in inputs:
+            fn(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return outputs, summarize(latencies, total, peak)
+
+def run_size(paths, memory=True):
+    """Runs every stage over `paths`, each stage fed by the outputs of the previous ones."""
+    from modules import (
+        parser, preprocessing, ner_extraction, skill_extraction, matching, semantic, highlight, report,
+        experience_level
+    )
+    stages = {}
+
+    texts, stages["parser.extract_text"] = time_stage(parser.extract_text, [(path,) for path in paths], memory)
+    processed, stages["preprocessing.preprocess_text"] = time_stage(
+        preprocessing.preprocess_text, [(text,) for text in texts], memory, reset=preprocessing.clear_cache)
+    ner, stages["ner_extraction.extract_ner_details"] = time_stage(
+        ner_extraction.extract_ner_details, [(text,) for text in texts], memory)
+    skills, stages["skill_extraction.extract_skills"] = time_stage(
+        skill_extraction.extract_skills, [(text,) for text in texts], memory)
+
+    # TF-IDF similarities are an input to compute_weighted_score, not part of it
+    job_processed = preprocessing.preprocess_text(JOB_DESCRIPTION)
+    similarities = matching.TfidfIndex().fit(processed).similarities(job_processed)
+    weighted, stages["matching.compute_weighted_score"] = time_stage(
+        matching.compute_weighted_score,
+        [(found, JOB_SKILLS, float(sim)) for found, sim in zip(skills, similarities)], memory)
+    semantic_scores, stages["semantic.compute_semantic_score"] = time_stage(
+        semantic.compute_semantic_score, [(text, JOB_DESCRIPTION) for text in texts], memory)
+    highlighted, stages["highlight.highlight_skills_intensity"] = time_stage(
+        highlight.highlight_skills_intensity,
+        [(text, {skill.lower(): 1.0 if skill.lower() in JOB_SKILLS else 0.5 for skill in found})
+         for text, found in zip(texts, skills)], memory)
+
+    df = pd.DataFrame({
+        "Filename": [os.path.basename(path) for path in paths],
+        "Score": [round(0.7 * w + 0.3 * s, 2) for w, s in zip(weighted, semantic_scores)],
+        "experience": [details["experience"] for details in ner],
+        "Experience Level": [experience_level.detect_experience_level(details["experience"]) for details in ner],
+        "Highlighted Resume": highlighted,
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, "report.pdf")
+        results, stages["report.generate_full_report"] = time_stage(
+            _full_report, [(df, JOB_SKILLS, report_path)], memory)
+    # PDF conversion fails without wkhtmltopdf; the job reports it in its error field
+    stages["report.generate_full_report"]["ok"] = results[0].error is None
+    stages["report.generate_full_report"]["error"] = results[0].error
+    return stages
+
+def compare(current, baseline):
+    """Prints p50 latency and throughput ratios (current / baseline) per size and stage."""
+    base_runs = {run["corpus_size"]: run["stages"] for run in baseline["runs"]}
+    print(f"{'size':>6}  {'stage':<40} {'p50 x':>8} {'tput x':>8}")
+    for run in current["runs"]:
+        base = base_runs.get(run["corpus_size"])
+        if base is None:
+            continue
+        for name, stats in run["stages"].items():
+            old = base.get(name)
+            if not old or not old["p50_ms"] or not old["throughput_per_s"]:
+                continue
+            print(f"{run['corpus_size']:>6}  {name:<40} "
+                  f"{stats['p50_ms'] / old['p50_ms']:>8.2f} {stats['throughput_per_s'] / old['throughput_per_s']:>8.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000", help="comma-separated corpus sizes (e.g. 10,100,1000,10000)")
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--skill-density", type=float, default=0.03)
+    parser.add_argument("--formats", default="pdf,docx")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus-root", default=os.path.join(DATA_DIR, "benchmarks"),
+                        help="generated corpora are kept here and reused across runs")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    out_dir = corpus_dir(args.corpus_root, args.pages, args.skill_density, args.seed)
+    print(f"[INFO] Generating up to {sizes[-1]} resumes in {out_dir}", file=sys.stderr)
+    paths = generate_corpus(out_dir, sizes[-1], args.pages, args.skill_density,
+                            tuple(args.formats.split(",")), args.seed)
+
+    # Load the models before timing anything
+    from modules import models
+    models.warm_up()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "pages": args.pages, "skill_density": args.skill_density,
+            "formats": args.formats, "seed": args.seed,
+        },
+        "runs": [],
+    }
+    for size in sizes:
+        print(f"[INFO] Corpus size {size}", file=sys.stderr)
+        results["runs"].append({"corpus_size": size, "stages": run_size(paths[:size], not args.no_memory)})
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
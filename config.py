@@ -16,6 +16,8 @@ RAW_RESUME_DIR = os.path.join(DATA_DIR, "resumes_raw")  # folder containing inpu
 PROCESSED_RESUME_DIR = os.path.join(DATA_DIR, "resumes_processed")
 EXTRACTED_TEXT_DIR = os.path.join(DATA_DIR, "text_extracted")
 EMBEDDINGS_DIR = os.path.join(DATA_DIR, "embeddings")  # store vectorized resume embeddings
+HIGHLIGHT_DIR = os.path.join(DATA_DIR, "highlighted_resumes")  # exported highlighted HTML / PDF resumes
+REPORTS_DIR = os.path.join(DATA_DIR, "reports")  # full PDF reports
 
 # --------------------------
 # NLP / Model Settings
@@ -33,6 +35,19 @@ SKILLS_KEYWORDS = [
     "Leadership", "Project Management", "AWS", "Docker", "Kubernetes"
 ]
 
+# Skill taxonomy (JSON list of skills, or mapping of skill id -> aliases)
+# and the compiled matcher cached from it
+SKILLS_TAXONOMY_FILE = os.path.join(DATA_DIR, "skills_taxonomy.json")
+SKILLS_AUTOMATON_CACHE = os.path.join(DATA_DIR, "skills_automaton.pkl")
+
+# Batched preprocessing (nlp.pipe) and the lemmatization cache
+PREPROCESS_BATCH_SIZE = 64
+PREPROCESS_N_PROCESS = 1  # spaCy worker processes for preprocess_batch
+PREPROCESS_CACHE_SIZE = 256  # cleaned texts kept in the lemma cache
+
+# Characters at the top of a resume searched for the candidate's name (spaCy NER)
+NER_HEADER_CHARS = 1000
+
 # Minimum confidence threshold for entity recognition
 ENTITY_CONFIDENCE_THRESHOLD = 0.85
 
@@ -41,18 +56,56 @@ ENTITY_CONFIDENCE_THRESHOLD = 0.85
 # --------------------------
 ALLOWED_EXTENSIONS = ["pdf", "docx"]  # allowed file formats
 MAX_RESUME_FILE_SIZE_MB = 10  # max allowed file size
+PARSE_MAX_PAGES = 20  # pages read per PDF; the rest is not parsed
+PARSE_MAX_CHARS = 100_000  # extraction stops once this much text has been read
 
 # --------------------------
 # Embedding / Vectorization Config
 # --------------------------
 EMBEDDING_DIM = 384  # dimension for MiniLM embeddings
 SIMILARITY_THRESHOLD = 0.75  # cosine similarity threshold for matching resumes to jobs
+SEMANTIC_BATCH_SIZE = 32  # max chunks per encoder forward pass
+ENCODER_MAX_BATCH_TOKENS = 8192  # padded tokens per forward pass (bounds encoder memory)
+ENCODER_CHUNK_OVERLAP = 32  # tokens shared by consecutive windows of a long resume
+ANN_MIN_CORPUS = 100_000  # use the approximate (IVF) index for match_resumes above this many resumes
+ANN_N_PROBE = 16  # clusters scanned per approximate query
+EMBEDDING_STORAGE = "float32"  # in-memory copy searched by match_resumes: "float32", "float16" or "int8"
+RERANK_DEPTH = 256  # quantized hits re-scored against the full-precision vectors on disk
+
+# --------------------------
+# Ingestion
+# --------------------------
+INGEST_WORKERS = os.cpu_count() or 1  # worker processes for parsing / feature extraction
+INGEST_CHUNK_SIZE = 16  # resumes per task sent to a worker
+INGEST_START_METHOD = "spawn"  # workers load their own models instead of inheriting them via fork
+INGEST_APP_CHUNK_SIZE = 4  # smaller chunks for the app's background ingestion, so first results arrive sooner
+
+EXPORT_WORKERS = min(4, os.cpu_count() or 1)  # concurrent wkhtmltopdf conversions
+REPORT_TOP_K = 20  # candidates with their full highlighted resume in the report; the rest get a table row
+REPORT_CHART_DIR = os.path.join(REPORTS_DIR, "charts")  # report charts, cached per dataset hash
+REPORT_CHART_MAX_SETS = 32  # least recently used chart sets are removed beyond this many datasets
+
+# --------------------------
+# Feature Cache
+# --------------------------
+PIPELINE_VERSION = "3"  # bump when parsing / feature extraction changes to invalidate cached entries
+FEATURE_CACHE_MAX_MB = 512  # least recently used entries are evicted beyond this size
+FEATURE_CACHE_EVICT_TO = 0.9  # eviction frees space down to this fraction of the limit, so it runs rarely
+
+# --------------------------
+# Near-Duplicate Detection
+# --------------------------
+DEDUP_ENABLED = True  # reuse the features / embedding of a resume already processed with (almost) the same text
+DEDUP_THRESHOLD = 0.9  # estimated Jaccard similarity of word shingles above which two resumes are duplicates
+MINHASH_PERMUTATIONS = 128  # MinHash signature length
+MINHASH_SHINGLE_SIZE = 3  # words per shingle
 
 # --------------------------
 # Evaluation / Metrics
 # --------------------------
 EVAL_METRICS = ["precision", "recall", "f1-score"]  # evaluation metrics for matching or classification
 TOP_N_MATCHES = 5  # number of top resumes to return per job description
+JOB_CACHE_SIZE = 128  # preprocessed / embedded job descriptions kept in memory (by hash)
 
 # --------------------------
 # Logging Settings
@@ -60,12 +113,16 @@ TOP_N_MATCHES = 5  # number of top resumes to return per job description
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 LOG_FILE = os.path.join(LOG_DIR, "app.log")
 LOG_LEVEL = "INFO"
+METRICS_ENABLED = False  # stage timings and counters (see modules/instrumentation.py)
+METRICS_FILE = os.path.join(LOG_DIR, "metrics.prom")  # Prometheus text; a .json copy is written next to it
+PROFILE_DIR = os.path.join(LOG_DIR, "profiles")  # cProfile dumps of profiled batches
 
 # --------------------------
 # Database / Storage Config (Optional)
 # --------------------------
 DB_DIR = os.path.join(BASE_DIR, "database")
 DB_URI = "sqlite:///" + os.path.join(DB_DIR, "resumes.db")
+DEDUP_DB = os.path.join(DB_DIR, "minhash.db")  # MinHash signatures and LSH buckets of processed resumes
 
 # --------------------------
 # Utility Functions
@@ -74,10 +131,7 @@ def ensure_dirs():
     """Ensure all necessary directories exist."""
     for folder in [
         DATA_DIR, RAW_RESUME_DIR, PROCESSED_RESUME_DIR,
-        EXTRACTED_TEXT_DIR, EMBEDDINGS_DIR, LOG_DIR, DB_DIR
+        EXTRACTED_TEXT_DIR, EMBEDDINGS_DIR, HIGHLIGHT_DIR, REPORTS_DIR, LOG_DIR, DB_DIR
     ]:
         if not os.path.exists(folder):
             os.makedirs(folder)
-
-# Call at import to auto-create folders
-ensure_dirs()
@@ -0,0 +1,245 @@
+# modules/background_ingest.py
+import threading
+
+from config import DEDUP_ENABLED, INGEST_APP_CHUNK_SIZE, INGEST_WORKERS
+from modules import dedup, features, ingestion, instrumentation
+from modules.feature_cache import FeatureCache
+
+class IngestJob:
+    """
+    Runs ingestion.ingest() for the app's new uploads on a background
+    thread, so the Streamlit script never blocks on parsing, spaCy or the
+    encoder and widget changes do not restart the work.
+
+    Items are handed to the process pool lazily, at most one chunk ahead
+    per worker, so add(), prioritize() and cancel() take effect for
+    everything that has not been submitted yet. Once the queue runs dry
+    the job takes no more items (add() returns False); IngestJobs starts
+    another one and keeps collecting from both. Finished features are
+    written to the feature cache and collected by the script with
+    collect() on its next run.
+    """
+
+    def __init__(self, items=(), workers=None, chunk_size=INGEST_APP_CHUNK_SIZE, profile=False):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.profile = profile
+        self.error = None
+        self._lock = threading.Lock()
+        self._pending = []  # [(key, name, data)], next to submit first
+        self._queued = set()  # keys pending or submitted
+        self._submitted = []  # key of each submitted item, by ingest() index
+        self._results = {}  # key -> features, not collected yet
+        self._errors = []  # (key, name, error), not collected yet
+        self._finished = 0
+        self._finished_keys = set()
+        self._names = {}  # key -> file name
+        self.duplicates = 0  # resumes that reused the features of a near or exact duplicate
+        self._cancelled = False
+        self._closed = False  # no more items accepted once the item stream has ended
+        self._metrics = instrumentation.registry()  # the creating session's metrics
+        self.add(items)
+        self._thread = threading.Thread(target=self._run, name="resume-ingest", daemon=True)
+
+    # ---------------------------
+    # Control
+    # ---------------------------
+    def add(self, items):
+        """
+        Queues (key, name, data) items not queued before. Returns False when
+        the job has already stopped taking items (start a new job instead).
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            for key, name, data in items:
+                if key not in self._queued:
+                    self._queued.add(key)
+                    self._names[key] = name
+                    self._pending.append((key, name, data))
+            return True
+
+    def prioritize(self, keys):
+        """Moves the pending items with these keys to the front of the queue."""
+        keys = set(keys)
+        with self._lock:
+            self._pending.sort(key=lambda item: item[0] not in keys)
+
+    def cancel(self):
+        """Drops everything not yet submitted; chunks already on the pool still finish."""
+        with self._lock:
+            self._cancelled = True
+            for key, _, _ in self._pending:
+                self._queued.discard(key)
+            self._pending.clear()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # ---------------------------
+    # Status
+    # ---------------------------
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def progress(self):
+        """(finished, total) items, where total excludes cancelled ones."""
+        with self._lock:
+            return self._finished, len(self._queued)
+
+    def __contains__(self, key):
+        """Whether `key` is queued, being processed or finished by this job."""
+        with self._lock:
+            return key in self._queued
+
+    def pending_names(self):
+        """{key: file name} of the items waiting to be submitted, in queue order."""
+        with self._lock:
+            return {key: name for key, name, _ in self._pending}
+
+    def has_results(self):
+        with self._lock:
+            return bool(self._results or self._errors)
+
+    def collect(self):
+        """Returns ({key: features}, [(key, name, error)]) finished since the last call."""
+        with self._lock:
+            results, errors = self._results, self._errors
+            self._results, self._errors = {}, []
+        return results, errors
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.done
+
+    # ---------------------------
+    # Worker thread
+    # ---------------------------
+    def _items(self):
+        """Feeds ingest() from the queue, reading it again for every item."""
+        while True:
+            with self._lock:
+                if self._cancelled or not self._pending:
+                    self._closed = True
+                    return
+                key, name, data = self._pending.pop(0)
+                self._submitted.append(key)
+            yield name, data
+
+    def _run(self):
+        instrumentation.activate(self._metrics)
+        feature_cache = FeatureCache(version=features.feature_version())
+        duplicate_index = dedup.DuplicateIndex() if DEDUP_ENABLED else None
+        workers = self.workers
+        if workers is None:
+            with self._lock:
+                workers = min(INGEST_WORKERS, -(-len(self._pending) // self.chunk_size))
+        try:
+            with instrumentation.profile("app-ingest", enabled=self.profile), instrumentation.span("ingest"):
+                for result in ingestion.ingest(self._items(), workers=workers, chunk_size=self.chunk_size,
+                                               max_in_flight=workers):
+                    key = self._submitted[result.index]
+                    if result.error is None:
+                        feature_cache.put(key, result.features, embedding=result.features["embedding"])
+                        # Signatures are indexed only once the features they point to are cached
+                        if duplicate_index is not None and result.duplicate_of is None:
+                            duplicate_index.add([(key, dedup.text_hash(result.features["text"]), result.signature)])
+                    with self._lock:
+                        self.duplicates += result.duplicate_of is not None
+                        self._finished += 1
+                        self._finished_keys.add(key)
+                        if result.error is None:
+                            self._results[key] = result.features
+                        else:
+                            self._errors.append((key, result.name, result.error))
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            with self._lock:
+                self._closed = True
+                if self.error:
+                    # Report everything the job did not finish, so it is not silently queued again
+                    for key in self._queued - self._finished_keys:
+                        self._errors.append((key, self._names[key], f"ingestion stopped: {self.error}"))
+            if duplicate_index is not None:
+                duplicate_index.close()
+
+class IngestJobs:
+    """
+    The app's live IngestJobs. New items go to the newest job while it is
+    still taking items, otherwise to a new job; results and errors are
+    collected from every job until it is finished, so nothing is lost or
+    processed twice when uploads are added while a job is running.
+    """
+
+    def __init__(self):
+        self.jobs = []
+        self._finished_duplicates = 0
+
+    def add(self, items, **job_options):
+        """Queues (key, name, data) items that no live job has seen."""
+        items = [item for item in items if item[0] not in self]
+        if not items:
+            return
+        if not self.jobs or not self.jobs[-1].add(items):
+            self.jobs.append(IngestJob(items, **job_options).start())
+
+    def collect(self):
+        """({key: features}, [(key, name, error)], [job errors]) from all jobs; drops finished ones."""
+        results, errors, job_errors, live = {}, [], [], []
+        for job in self.jobs:
+            done = job.done  # checked first, so a finished job has nothing left after collect()
+            job_results, job_failures = job.collect()
+            results.update(job_results)
+            errors.extend(job_failures)
+            if not done:
+                live.append(job)
+                continue
+            self._finished_duplicates += job.duplicates
+            if job.error:
+                job_errors.append(job.error)
+        self.jobs = live
+        return results, errors, job_errors
+
+    @property
+    def duplicates(self):
+        """Resumes that reused the features of a duplicate, over all jobs so far."""
+        return self._finished_duplicates + sum(job.duplicates for job in self.jobs)
+
+    @property
+    def running(self):
+        return bool(self.jobs)
+
+    def __contains__(self, key):
+        return any(key in job for job in self.jobs)
+
+    def has_results(self):
+        return any(job.has_results() or job.done for job in self.jobs)
+
+    def progress(self):
+        finished = total = 0
+        for job in self.jobs:
+            job_finished, job_total = job.progress()
+            finished += job_finished
+            total += job_total
+        return finished, total
+
+    def pending_names(self):
+        names = {}
+        for job in self.jobs:
+            names.update(job.pending_names())
+        return names
+
+    def prioritize(self, keys):
+        for job in self.jobs:
+            job.prioritize(keys)
+
+    def cancel(self):
+        for job in self.jobs:
+            job.cancel()
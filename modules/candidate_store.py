@@ -0,0 +1,280 @@
+# modules/candidate_store.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import DB_URI, PIPELINE_VERSION, TOP_N_MATCHES
+from modules import experience_level
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    filename TEXT NOT NULL,
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    education TEXT,
+    experience REAL NOT NULL DEFAULT 0,
+    experience_level TEXT,
+    added_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_experience ON candidates (experience);
+
+CREATE TABLE IF NOT EXISTS features (
+    candidate_id INTEGER PRIMARY KEY REFERENCES candidates (id) ON DELETE CASCADE,
+    version TEXT NOT NULL,
+    text TEXT,
+    processed TEXT,
+    embedding BLOB
+);
+
+CREATE TABLE IF NOT EXISTS skills (
+    candidate_id INTEGER NOT NULL REFERENCES candidates (id) ON DELETE CASCADE,
+    skill TEXT NOT NULL,
+    PRIMARY KEY (candidate_id, skill)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_skills_skill ON skills (skill);
+
+CREATE TABLE IF NOT EXISTS education (
+    candidate_id INTEGER NOT NULL REFERENCES candidates (id) ON DELETE CASCADE,
+    degree TEXT NOT NULL,
+    PRIMARY KEY (candidate_id, degree)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_education_degree ON education (degree, candidate_id);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    skills TEXT,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS scores (
+    job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    candidate_id INTEGER NOT NULL REFERENCES candidates (id) ON DELETE CASCADE,
+    score REAL NOT NULL,
+    PRIMARY KEY (job_id, candidate_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_scores_job_score ON scores (job_id, score DESC);
+"""
+
+def sqlite_path(uri=DB_URI):
+    """File path of a sqlite:/// URI (a plain path is returned as is)."""
+    prefix = "sqlite:///"
+    return uri[len(prefix):] if uri.startswith(prefix) else uri
+
+def text_hash(text):
+    """Identity of a candidate in the store: SHA-256 of the extracted text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def job_key(text, skills):
+    """Identity of a job for stored scores: its description plus the key skills it was scored with."""
+    return hashlib.sha256(("\0".join([text] + sorted(skills))).encode("utf-8")).hexdigest()
+
+def _chunks(values, size=500):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+class CandidateStore:
+    """
+    Persistent candidate pool on the SQLite database at config.DB_URI.
+
+    Candidates, their extracted features, skills, degrees and per-job
+    scores live in separate tables, written in bulk (one transaction per
+    batch, WAL journal). query() pushes the score, experience and
+    education filters and the top-K ordering into SQL, so a session over
+    hundreds of thousands of stored candidates only ever loads the page
+    of rows it shows.
+    """
+
+    def __init__(self, uri=DB_URI):
+        path = sqlite_path(uri)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+    def add_candidates(self, records, store_text=True):
+        """
+        Inserts or updates candidates in one transaction.
+        records: iterable of dicts with "filename" and the features dict
+        produced by features.extract_features (text, processed, ner,
+        skills, optionally embedding). Returns {content hash: candidate id}.
+        """
+        rows, feature_rows, skill_rows, degree_rows = [], [], [], []
+        now = time.time()
+        for record in records:
+            feats = record["features"]
+            ner = feats.get("ner") or {}
+            experience = float(ner.get("experience") or 0)
+            content_hash = record.get("content_hash") or text_hash(feats["text"])
+            rows.append((
+                content_hash, record["filename"], ner.get("name"), ner.get("email"), ner.get("phone"),
+                ner.get("education") or "", experience, experience_level.detect_experience_level(experience), now
+            ))
+            embedding = feats.get("embedding")
+            feature_rows.append((
+                content_hash, PIPELINE_VERSION,
+                feats.get("text") if store_text else None, feats.get("processed") if store_text else None,
+                None if embedding is None else np.asarray(embedding, dtype="<f4").tobytes()
+            ))
+            skill_rows.extend((content_hash, skill.lower()) for skill in dict.fromkeys(feats.get("skills") or []))
+            degree_rows.extend((content_hash, degree.strip().lower())
+                               for degree in (ner.get("education") or "").split(",") if degree.strip())
+        if not rows:
+            return {}
+
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO candidates (content_hash, filename, name, email, phone, education, experience,
+                                        experience_level, added_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (content_hash) DO UPDATE SET
+                    filename = excluded.filename, name = excluded.name, email = excluded.email,
+                    phone = excluded.phone, education = excluded.education, experience = excluded.experience,
+                    experience_level = excluded.experience_level
+            """, rows)
+            ids = self._ids([row[0] for row in rows])
+            id_list = [(ids[row[0]],) for row in rows]
+            self._conn.executemany("DELETE FROM skills WHERE candidate_id = ?", id_list)
+            self._conn.executemany("DELETE FROM education WHERE candidate_id = ?", id_list)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO features (candidate_id, version, text, processed, embedding) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(ids[h], *rest) for h, *rest in feature_rows]
+            )
+            self._conn.executemany("INSERT OR IGNORE INTO skills (candidate_id, skill) VALUES (?, ?)",
+                                   [(ids[h], skill) for h, skill in skill_rows])
+            self._conn.executemany("INSERT OR IGNORE INTO education (candidate_id, degree) VALUES (?, ?)",
+                                   [(ids[h], degree) for h, degree in degree_rows])
+        return ids
+
+    def add_scores(self, job_id, scores, job_name=None, job_skills=()):
+        """
+        Stores (content hash, score) pairs for one job in a single
+        transaction. Candidates must already be stored.
+        """
+        scores = list(scores)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, name, skills, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET name = COALESCE(excluded.name, jobs.name)",
+                (job_id, job_name, ",".join(job_skills), time.time())
+            )
+            ids = self._ids([content_hash for content_hash, _ in scores])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores (job_id, candidate_id, score) VALUES (?, ?, ?)",
+                [(job_id, ids[content_hash], float(score)) for content_hash, score in scores if content_hash in ids]
+            )
+
+    # ---------------------------
+    # Reads
+    # ---------------------------
+    def _ids(self, hashes):
+        ids = {}
+        for chunk in _chunks(hashes):
+            placeholders = ",".join("?" * len(chunk))
+            ids.update(self._conn.execute(
+                f"SELECT content_hash, id FROM candidates WHERE content_hash IN ({placeholders})", chunk
+            ).fetchall())
+        return ids
+
+    def known_hashes(self, hashes):
+        """The subset of `hashes` that is already stored."""
+        with self._lock:
+            return set(self._ids(hashes))
+
+    def count(self, job_id=None):
+        """Stored candidates, or candidates scored for `job_id`."""
+        with self._lock:
+            if job_id is None:
+                return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM scores WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+    def jobs(self):
+        """Stored jobs with the number of candidates scored for each, newest first."""
+        with self._lock:
+            return pd.read_sql_query("""
+                SELECT j.id, j.name, j.skills, j.created_at,
+                       (SELECT COUNT(*) FROM scores s WHERE s.job_id = j.id) AS candidates
+                FROM jobs j ORDER BY j.created_at DESC
+            """, self._conn)
+
+    def query(self, job_id=None, min_score=None, experience=None, education=None,
+              limit=TOP_N_MATCHES, offset=0):
+        """
+        One page of candidates as a DataFrame (same columns as the app's
+        candidate table). With job_id, candidates scored for that job are
+        returned best first and min_score applies; otherwise the most
+        recently added come first.
+
+        experience: (min years, max years); education: degrees, any of
+        which must be among the candidate's (case-insensitive, e.g.
+        ["B.Tech", "PhD"]), looked up in the education table's index.
+        """
+        where, params = [], []
+        if job_id is not None:
+            source = "scores s JOIN candidates c ON c.id = s.candidate_id"
+            score = "s.score"
+            where.append("s.job_id = ?")
+            params.append(job_id)
+            if min_score is not None:
+                where.append("s.score >= ?")
+                params.append(float(min_score))
+            order = "s.score DESC, c.id"
+        else:
+            source, score, order = "candidates c", "NULL", "c.id DESC"
+        if experience is not None:
+            where.append("c.experience BETWEEN ? AND ?")
+            params.extend(float(years) for years in experience)
+        if education:
+            degrees = list(dict.fromkeys(degree.strip().lower() for degree in education))
+            where.append("EXISTS (SELECT 1 FROM education e WHERE e.candidate_id = c.id "
+                         f"AND e.degree IN ({','.join('?' * len(degrees))}))")
+            params.extend(degrees)
+
+        sql = f"""
+            SELECT c.id AS candidate_id, c.filename AS "Filename", {score} AS "Score",
+                   (SELECT group_concat(k.skill, ', ') FROM skills k WHERE k.candidate_id = c.id) AS "Skills Found",
+                   c.experience_level AS "Experience Level", c.name AS name, c.email AS email, c.phone AS phone,
+                   c.education AS education, c.experience AS experience
+            FROM {source}
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        """
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params + [int(limit), int(offset)])
+        df["Skills Found"] = df["Skills Found"].fillna("")
+        return df
+
+    def embeddings(self, candidate_ids):
+        """{candidate id: float32 embedding} for the given ids (missing ones are skipped)."""
+        out = {}
+        with self._lock:
+            for chunk in _chunks(candidate_ids):
+                placeholders = ",".join("?" * len(chunk))
+                for candidate_id, blob in self._conn.execute(
+                    f"SELECT candidate_id, embedding FROM features WHERE candidate_id IN ({placeholders}) "
+                    f"AND embedding IS NOT NULL", [int(i) for i in chunk]
+                ):
+                    out[candidate_id] = np.frombuffer(blob, dtype="<f4")
+        return out
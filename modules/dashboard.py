@@ -2,18 +2,26 @@ import plotly.express as px
 import pandas as pd
 import streamlit as st
 
-def show_dashboard(df):
+def count_skills(df):
+    """Candidates per skill from the comma-joined 'Skills Found' column."""
+    skills = df['Skills Found'].str.split(",").explode().str.strip()
+    return skills[skills.notna() & (skills != "")].value_counts()
+
+def show_dashboard(df, skill_counts=None):
+    """
+    skill_counts: optional Series of candidates per skill (e.g.
+    ResumeFeatureTable.skill_counts for the displayed rows); otherwise
+    counted from 'Skills Found'.
+    """
     if df.empty:
         st.info("No data available for dashboard.")
         return
 
     # ----- Skills Distribution -----
     st.subheader("Skills Distribution")
-    all_skills = []
-    for s in df['Skills Found']:
-        all_skills.extend([skill.strip() for skill in s.split(",") if skill])
-    skill_counts = pd.Series(all_skills).value_counts().reset_index()
-    skill_counts.columns = ['Skill', 'Count']
+    if skill_counts is None:
+        skill_counts = count_skills(df)
+    skill_counts = skill_counts.rename_axis('Skill').reset_index(name='Count')
     fig1 = px.bar(skill_counts, x='Skill', y='Count', title="Skills Distribution Across Candidates")
     st.plotly_chart(fig1, use_container_width=True)
 
@@ -0,0 +1,173 @@
+# modules/dedup.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+
+from config import DEDUP_DB, DEDUP_THRESHOLD, MINHASH_PERMUTATIONS, MINHASH_SHINGLE_SIZE
+
+# Near-duplicate detection for resumes that are resubmitted with small
+# edits. Each extracted text gets a MinHash signature over its word
+# shingles; an LSH index (signature bands -> buckets, in SQLite so the
+# ingestion workers can read it) finds stored resumes whose estimated
+# Jaccard similarity is above DEDUP_THRESHOLD, and their cached features
+# and embeddings are reused instead of running spaCy and the encoder again.
+
+_WORD_RE = re.compile(r"\w+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def _permutations(num_perm, seed=1):
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+_PERMUTATIONS = {}
+
+def shingles(text, size=MINHASH_SHINGLE_SIZE):
+    """Set of lowercase word `size`-grams of text."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash(text, num_perm=MINHASH_PERMUTATIONS, size=MINHASH_SHINGLE_SIZE):
+    """
+    uint32 MinHash signature of text's shingles, or None for text without
+    words. a * h + b stays below 2**64 because a, b and h are 32-bit.
+    """
+    grams = shingles(text, size)
+    if not grams:
+        return None
+    if num_perm not in _PERMUTATIONS:
+        _PERMUTATIONS[num_perm] = _permutations(num_perm)
+    a, b = _PERMUTATIONS[num_perm]
+    hashes = np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+    permuted = (a * hashes[None, :] + b) % np.uint64(_MERSENNE_PRIME) & np.uint64(_MAX_HASH)
+    return permuted.min(axis=1).astype(np.uint32)
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(signature_a == signature_b))
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def bands_for(threshold, num_perm=MINHASH_PERMUTATIONS, margin=0.1):
+    """
+    Number of LSH bands for `threshold`. Picks the band layout whose
+    candidate threshold (1/b)**(1/r) is closest below threshold - margin,
+    so pairs at the threshold almost always collide; candidates are then
+    checked against the full signature.
+    """
+    best = 1
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        if (1 / bands) ** (bands / num_perm) <= threshold - margin:
+            return bands
+        best = bands
+    return best
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_signatures_text ON signatures (namespace, text_hash);
+
+CREATE TABLE IF NOT EXISTS buckets (
+    namespace TEXT NOT NULL,
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (namespace, band, bucket, key)
+) WITHOUT ROWID;
+"""
+
+class DuplicateIndex:
+    """
+    Persistent LSH index of MinHash signatures, one namespace per kind of
+    key (feature cache keys, embedding store hashes). find() returns the
+    stored key with the same text, or else the most similar one at or
+    above the threshold.
+    """
+
+    def __init__(self, path=DEDUP_DB, namespace="features", threshold=DEDUP_THRESHOLD,
+                 num_perm=MINHASH_PERMUTATIONS):
+        self.namespace = namespace
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands_for(threshold, num_perm)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _buckets(self, signature):
+        rows = self.num_perm // self.bands
+        return [
+            (band, int.from_bytes(hashlib.blake2b(part.tobytes(), digest_size=8).digest(), "little", signed=True))
+            for band, part in enumerate(signature.reshape(self.bands, rows))
+        ]
+
+    def add(self, entries):
+        """Stores (key, text hash, signature) entries in one transaction."""
+        entries = [(key, digest, signature) for key, digest, signature in entries if signature is not None]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO signatures (namespace, key, text_hash, signature) VALUES (?, ?, ?, ?)",
+                [(self.namespace, key, digest, signature.astype("<u4").tobytes()) for key, digest, signature in entries]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO buckets (namespace, band, bucket, key) VALUES (?, ?, ?, ?)",
+                [(self.namespace, band, bucket, key)
+                 for key, _, signature in entries for band, bucket in self._buckets(signature)]
+            )
+
+    def find(self, digest, signature):
+        """
+        (key, similarity, exact) of the best stored duplicate of a text
+        with this hash and signature, or None.
+        """
+        with self._lock:
+            for (key,) in self._conn.execute(
+                "SELECT key FROM signatures WHERE namespace = ? AND text_hash = ?", (self.namespace, digest)
+            ):
+                return key, 1.0, True
+            if signature is None:
+                return None
+            buckets = self._buckets(signature)
+            placeholders = ",".join("(?, ?)" for _ in buckets)
+            candidates = self._conn.execute(
+                f"SELECT DISTINCT s.key, s.signature FROM buckets b "
+                f"JOIN signatures s ON s.namespace = b.namespace AND s.key = b.key "
+                f"WHERE b.namespace = ? AND (b.band, b.bucket) IN (VALUES {placeholders})",
+                [self.namespace] + [value for pair in buckets for value in pair]
+            ).fetchall()
+        best = None
+        for key, blob in candidates:
+            score = similarity(signature, np.frombuffer(blob, dtype="<u4"))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score, False)
+        return best
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM signatures WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
@@ -0,0 +1,61 @@
+# modules/document.py
+from functools import cached_property
+
+from config import NER_HEADER_CHARS
+from modules import instrumentation
+from modules.models import run_nlp, NER_PIPES
+from modules.skill_matcher import normalize_text
+
+class ResumeDocument:
+    """
+    Parse-once view of a resume shared by all extractors.
+
+    The lowercased text, the skill matches, the lemmatized text and the
+    spaCy NER pass are each computed at most once, on first access. NER only
+    runs on the header window (the first NER_HEADER_CHARS characters), which
+    is where the candidate's name appears.
+    """
+
+    def __init__(self, text, header_chars=NER_HEADER_CHARS):
+        self.text = text
+        self.header_chars = header_chars
+
+    @classmethod
+    def of(cls, text_or_doc):
+        """Wraps a string; a ResumeDocument is returned as is."""
+        return text_or_doc if isinstance(text_or_doc, cls) else cls(text_or_doc)
+
+    @cached_property
+    def lower(self):
+        return self.text.lower()
+
+    @cached_property
+    def normalized(self):
+        """Lowercased text with the same length as `text`, for offset-based matching."""
+        return normalize_text(self.text, lowered=self.lower)
+
+    @cached_property
+    def header(self):
+        header = self.text[:self.header_chars]
+        if len(self.text) > self.header_chars:
+            # Cut at a line break so a name is not split in half
+            cut = header.rfind("\n")
+            if cut > self.header_chars // 2:
+                header = header[:cut]
+        return header
+
+    @cached_property
+    def header_doc(self):
+        with instrumentation.span("spacy.ner"):
+            return run_nlp(self.header, NER_PIPES)
+
+    @cached_property
+    def skill_matches(self):
+        from modules import skill_extraction
+        with instrumentation.span("skills"):
+            return skill_extraction.get_matcher().find(self.text, normalized=self.normalized)
+
+    @cached_property
+    def processed(self):
+        from modules import preprocessing
+        return preprocessing.preprocess_text(self.text)
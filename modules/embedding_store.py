@@ -0,0 +1,186 @@
+# modules/embedding_store.py
+import json
+import os
+
+import numpy as np
+
+from config import EMBEDDINGS_DIR, EMBEDDING_DIM
+
+class EmbeddingStore:
+    """
+    Append-only store of resume embeddings.
+
+    Vectors live in one float32 matrix file (<name>.f32) that is
+    memory-mapped read-only, so opening a store with 200k candidates does
+    not read or unpickle anything. The manifest (<name>.manifest.jsonl) is
+    an append-only log of "add" / "del" records that maps filename and
+    content hash to a row. Deleted rows are tombstoned and reclaimed by
+    compact().
+    """
+
+    def __init__(self, directory=EMBEDDINGS_DIR, name="resume_embeddings", dim=EMBEDDING_DIM):
+        self.directory = directory
+        self.dim = dim
+        self.matrix_path = os.path.join(directory, name + ".f32")
+        self.manifest_path = os.path.join(directory, name + ".manifest.jsonl")
+        os.makedirs(directory, exist_ok=True)
+        self._load_manifest()
+
+    # ---------------------------
+    # Manifest
+    # ---------------------------
+    def _load_manifest(self):
+        self.filenames = []
+        self.hashes = []
+        self._deleted = []
+        self._rows = {}  # filename -> live row
+        self._hash_rows = {}  # content hash -> live row
+        self._vectors = None
+        self.generation = 0  # bumped by compact(), which renumbers rows
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record["op"] == "add":
+                    self._add_row(record["filename"], record.get("hash"))
+                elif record["op"] == "del":
+                    self._delete_row(record["row"])
+                elif record["op"] == "generation":
+                    self.generation = record["value"]
+        # Vectors past the last manifest record (an interrupted append) are
+        # ignored here and overwritten by the next append
+        n_complete = os.path.getsize(self.matrix_path) // (4 * self.dim) if os.path.exists(self.matrix_path) else 0
+        if n_complete < len(self.filenames):
+            raise ValueError(f"Embedding matrix {self.matrix_path} is shorter than its manifest")
+
+    def _add_row(self, filename, content_hash):
+        if filename in self._rows:
+            self._delete_row(self._rows[filename])
+        self._rows[filename] = len(self.filenames)
+        self.filenames.append(filename)
+        self.hashes.append(content_hash)
+        self._deleted.append(False)
+        if content_hash is not None:
+            self._hash_rows[content_hash] = len(self.filenames) - 1
+
+    def _delete_row(self, row):
+        self._deleted[row] = True
+        if self._rows.get(self.filenames[row]) == row:
+            del self._rows[self.filenames[row]]
+        if self._hash_rows.get(self.hashes[row]) == row:
+            del self._hash_rows[self.hashes[row]]
+
+    def _write_records(self, records):
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    # ---------------------------
+    # Read access
+    # ---------------------------
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, filename):
+        return filename in self._rows
+
+    @property
+    def n_rows(self):
+        """Number of rows in the matrix, including tombstoned ones."""
+        return len(self.filenames)
+
+    @property
+    def vectors(self):
+        """Read-only memory-mapped (n_rows, dim) float32 matrix, tombstones included."""
+        if self._vectors is None:
+            if self.n_rows == 0:
+                self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            else:
+                self._vectors = np.memmap(self.matrix_path, dtype=np.float32, mode="r",
+                                          shape=(self.n_rows, self.dim))
+        return self._vectors
+
+    @property
+    def live_mask(self):
+        """Boolean mask of rows that have not been deleted."""
+        return ~np.asarray(self._deleted, dtype=bool)
+
+    def row_of(self, filename):
+        return self._rows.get(filename)
+
+    def get(self, filename):
+        row = self._rows.get(filename)
+        return None if row is None else np.asarray(self.vectors[row])
+
+    def has_hash(self, content_hash):
+        return content_hash in self._hash_rows
+
+    def row_of_hash(self, content_hash):
+        return self._hash_rows.get(content_hash)
+
+    # ---------------------------
+    # Updates
+    # ---------------------------
+    def append(self, filenames, vectors, hashes=None):
+        """
+        Appends one vector per filename and returns their rows. A filename
+        that is already stored is replaced (its old row is tombstoned).
+        """
+        filenames = list(filenames)
+        vectors = np.ascontiguousarray(vectors, dtype="<f4").reshape(len(filenames), self.dim)
+        hashes = list(hashes) if hashes is not None else [None] * len(filenames)
+        if not filenames:
+            return []
+
+        with open(self.matrix_path, "ab") as f:
+            f.seek(self.n_rows * 4 * self.dim)
+            f.truncate()  # drop vectors left over from an interrupted append
+            f.write(vectors.tobytes())
+
+        records = []
+        rows = []
+        for filename, content_hash in zip(filenames, hashes):
+            old_row = self._rows.get(filename)
+            if old_row is not None:
+                records.append({"op": "del", "row": old_row})
+            rows.append(self.n_rows)
+            self._add_row(filename, content_hash)
+            records.append({"op": "add", "filename": filename, "hash": content_hash})
+        self._write_records(records)
+        self._vectors = None
+        return rows
+
+    def delete(self, filename):
+        """Tombstones the row stored for `filename`. Returns False if it is not stored."""
+        row = self._rows.get(filename)
+        if row is None:
+            return False
+        self._delete_row(row)
+        self._write_records([{"op": "del", "row": row}])
+        return True
+
+    def compact(self, chunk_rows=8192):
+        """Rewrites the matrix and manifest without tombstoned rows."""
+        live_rows = np.flatnonzero(self.live_mask)
+        if len(live_rows) == self.n_rows:
+            return
+        vectors = self.vectors
+        tmp_matrix = self.matrix_path + ".tmp"
+        tmp_manifest = self.manifest_path + ".tmp"
+        with open(tmp_matrix, "wb") as f:
+            for start in range(0, len(live_rows), chunk_rows):
+                f.write(np.ascontiguousarray(vectors[live_rows[start:start + chunk_rows]]).tobytes())
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            # Derived indexes (IVF, quantized copies) compare this to detect renumbered rows
+            f.write(json.dumps({"op": "generation", "value": self.generation + 1}) + "\n")
+            for row in live_rows:
+                record = {"op": "add", "filename": self.filenames[row], "hash": self.hashes[row]}
+                f.write(json.dumps(record) + "\n")
+        self._vectors = None
+        del vectors
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_manifest, self.manifest_path)
+        self._load_manifest()
@@ -0,0 +1,103 @@
+# modules/encoding.py
+import re
+
+import numpy as np
+
+from config import ENCODER_CHUNK_OVERLAP, ENCODER_MAX_BATCH_TOKENS, SEMANTIC_BATCH_SIZE
+from modules import instrumentation
+from modules.models import get_encoder
+
+# Encoder front-end: long resumes are split into windows that fit the
+# model's token limit, windows from all texts are sorted by length and
+# packed into batches under a padded-token budget, and the window vectors
+# are pooled back into one unit-length vector per text.
+
+WORD_RE = re.compile(r"\S+")
+
+def _token_offsets(tokenizer, texts):
+    """
+    (start, end) character offsets of every token of every text, without
+    special tokens. Tokenizers without offset mapping fall back to words.
+    """
+    if getattr(tokenizer, "is_fast", False):
+        encoded = tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True,
+                            return_attention_mask=False, return_token_type_ids=False, verbose=False)
+        return [np.asarray(offsets, dtype=np.int64).reshape(-1, 2) for offsets in encoded["offset_mapping"]]
+    return [np.asarray([m.span() for m in WORD_RE.finditer(text)], dtype=np.int64).reshape(-1, 2) for text in texts]
+
+def chunk_texts(texts, tokenizer, max_tokens, overlap=ENCODER_CHUNK_OVERLAP):
+    """
+    Splits each text into windows of at most `max_tokens` tokens that
+    overlap by `overlap` tokens. Windows are slices of the original text
+    (cut at token boundaries), so re-tokenizing one gives the same tokens.
+
+    Returns (chunks, owners, lengths): the window texts, the index of the
+    text each window came from, and each window's token count.
+    """
+    stride = max(1, max_tokens - overlap)
+    chunks, owners, lengths = [], [], []
+    for i, (text, offsets) in enumerate(zip(texts, _token_offsets(tokenizer, texts))):
+        n_tokens = len(offsets)
+        if n_tokens <= max_tokens:
+            chunks.append(text)
+            owners.append(i)
+            lengths.append(max(n_tokens, 1))
+            continue
+        for start in range(0, n_tokens - overlap, stride):
+            end = min(start + max_tokens, n_tokens)
+            chunks.append(text[offsets[start][0]:offsets[end - 1][1]])
+            owners.append(i)
+            lengths.append(end - start)
+    return chunks, np.asarray(owners, dtype=np.int64), np.asarray(lengths, dtype=np.int64)
+
+def length_batches(lengths, max_batch_tokens=ENCODER_MAX_BATCH_TOKENS, max_batch_size=SEMANTIC_BATCH_SIZE):
+    """
+    Groups chunk indices into batches of similar length. Chunks are taken
+    longest first and a batch is closed once padding every chunk to the
+    batch's longest one would exceed `max_batch_tokens`, so the activation
+    memory of one forward pass stays bounded whatever the input mix.
+    """
+    order = np.argsort(-np.asarray(lengths), kind="stable")
+    batch = []
+    for idx in order:
+        if batch and (len(batch) >= max_batch_size or (len(batch) + 1) * longest > max_batch_tokens):
+            yield batch
+            batch = []
+        if not batch:
+            longest = int(lengths[idx])
+        batch.append(int(idx))
+    if batch:
+        yield batch
+
+def encode_chunked(texts, batch_size=SEMANTIC_BATCH_SIZE, max_batch_tokens=ENCODER_MAX_BATCH_TOKENS,
+                   overlap=ENCODER_CHUNK_OVERLAP, model=None):
+    """
+    Encodes texts of any length into a float32 matrix of unit-length rows.
+    Each row is the token-weighted mean of the text's window vectors.
+    """
+    model = model if model is not None else get_encoder()
+    texts = list(texts)
+    dim = model.get_sentence_embedding_dimension()
+    if not texts:
+        return np.zeros((0, dim), dtype=np.float32)
+
+    # Leave room for [CLS] / [SEP]
+    max_tokens = max(1, model.max_seq_length - 2)
+    with instrumentation.span("embedding"):
+        chunks, owners, lengths = chunk_texts(texts, model.tokenizer, max_tokens, overlap)
+        instrumentation.count("encoder_chunks", len(chunks))
+        instrumentation.count("encoder_tokens", int(lengths.sum()))
+
+        chunk_vectors = np.empty((len(chunks), dim), dtype=np.float32)
+        for batch in length_batches(lengths, max_batch_tokens, batch_size):
+            chunk_vectors[batch] = model.encode(
+                [chunks[idx] for idx in batch],
+                batch_size=len(batch),
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+
+    pooled = np.zeros((len(texts), dim), dtype=np.float32)
+    np.add.at(pooled, owners, chunk_vectors * lengths[:, None].astype(np.float32))
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return pooled / np.maximum(norms, 1e-12)
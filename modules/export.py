@@ -0,0 +1,99 @@
+# modules/export.py
+import hashlib
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import EXPORT_WORKERS, HIGHLIGHT_DIR
+from modules import instrumentation
+
+ExportResult = namedtuple("ExportResult", ["written", "unchanged", "failed"])
+
+MANIFEST_NAME = ".export_manifest.json"
+
+def safe_name(filename):
+    return filename.replace(" ", "_").replace(".pdf", "").replace(".docx", "")
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+def _convert(html_path, pdf_path, configuration, metrics):
+    import pdfkit
+    instrumentation.activate(metrics)  # pool threads start on the default registry
+    with instrumentation.span("export"):
+        pdfkit.from_file(html_path, pdf_path, configuration=configuration)
+
+def export_highlighted(resumes, out_dir=HIGHLIGHT_DIR, pdf=True, configuration=None,
+                       workers=EXPORT_WORKERS, progress=None):
+    """
+    Writes each resume's highlighted HTML (and PDF) to out_dir, skipping
+    outputs whose content has not changed since the last export.
+
+    resumes: iterable of (filename, highlighted html).
+    A manifest in out_dir records the SHA-256 of the HTML each output was
+    produced from. PDFs are converted on a pool of `workers` threads (each
+    conversion is a wkhtmltopdf subprocess). progress(done, total) is
+    called after every PDF.
+
+    Returns ExportResult(written, unchanged, failed) with file names;
+    failed is a list of (filename, error).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path)
+    written, unchanged, failed = [], [], []
+    pending_pdfs = []
+
+    for filename, html in resumes:
+        name = safe_name(filename)
+        digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        entry = manifest.setdefault(name, {})
+        html_path = os.path.join(out_dir, f"{name}_highlighted.html")
+        pdf_path = os.path.join(out_dir, f"{name}_highlighted.pdf")
+
+        html_changed = entry.get("html") != digest or not os.path.exists(html_path)
+        if html_changed:
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.write(html)
+            entry["html"] = digest
+        pdf_changed = pdf and (entry.get("pdf") != digest or not os.path.exists(pdf_path))
+        if pdf_changed:
+            pending_pdfs.append((filename, name, digest, html_path, pdf_path))
+        elif html_changed:
+            written.append(filename)
+        else:
+            unchanged.append(filename)
+    instrumentation.count("export_skipped", len(unchanged))
+
+    if pending_pdfs:
+        metrics = instrumentation.registry()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {
+                pool.submit(_convert, html_path, pdf_path, configuration, metrics): (filename, name, digest)
+                for filename, name, digest, html_path, pdf_path in pending_pdfs
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                filename, name, digest = futures[future]
+                try:
+                    future.result()
+                    manifest[name]["pdf"] = digest
+                    written.append(filename)
+                except Exception as e:
+                    instrumentation.count("export_failures")
+                    failed.append((filename, f"{type(e).__name__}: {e}"))
+                if progress:
+                    progress(done, len(futures))
+
+    _save_manifest(manifest_path, manifest)
+    return ExportResult(written, unchanged, failed)
@@ -0,0 +1,165 @@
+# modules/feature_cache.py
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+from config import EXTRACTED_TEXT_DIR, EMBEDDINGS_DIR, FEATURE_CACHE_EVICT_TO, FEATURE_CACHE_MAX_MB, PIPELINE_VERSION
+from modules import instrumentation
+
+_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+def file_digest(data):
+    """SHA-256 hex digest of a file's bytes, used as the cache key."""
+    return hashlib.sha256(data).hexdigest()
+
+class FeatureCache:
+    """
+    Persistent cache of per-resume features keyed by the SHA-256 of the
+    uploaded file's bytes.
+
+    Extracted text and derived features are stored as <key>.json in
+    EXTRACTED_TEXT_DIR, the embedding as <key>.npy in EMBEDDINGS_DIR.
+    Entries written by a different pipeline version are treated as misses.
+    When the cache grows past max_mb, the least recently used entries are
+    evicted until it is back under evict_to * max_mb.
+    """
+
+    def __init__(self, text_dir=EXTRACTED_TEXT_DIR, embeddings_dir=EMBEDDINGS_DIR,
+                 max_mb=FEATURE_CACHE_MAX_MB, version=PIPELINE_VERSION, evict_to=FEATURE_CACHE_EVICT_TO):
+        self.text_dir = text_dir
+        self.embeddings_dir = embeddings_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.low_water_bytes = int(self.max_bytes * evict_to)
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        os.makedirs(text_dir, exist_ok=True)
+        os.makedirs(embeddings_dir, exist_ok=True)
+
+    def _features_path(self, key):
+        return os.path.join(self.text_dir, key + ".json")
+
+    def _embedding_path(self, key):
+        return os.path.join(self.embeddings_dir, key + ".npy")
+
+    def get(self, key):
+        """
+        Returns the cached features for `key` (with an "embedding" entry
+        when one was stored), or None on a miss.
+        """
+        path = self._features_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            instrumentation.count("feature_cache_misses")
+            return None
+
+        if entry.get("version") != self.version:
+            self.discard(key)
+            self.misses += 1
+            instrumentation.count("feature_cache_misses")
+            return None
+
+        features = entry["features"]
+        emb_path = self._embedding_path(key)
+        if os.path.exists(emb_path):
+            try:
+                features["embedding"] = np.load(emb_path)
+            except (OSError, ValueError):
+                pass
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        instrumentation.count("feature_cache_hits")
+        return features
+
+    def put(self, key, features, embedding=None):
+        """Stores JSON-serializable `features` (and optionally an embedding) under `key`."""
+        features = {k: v for k, v in features.items() if k != "embedding"}
+        entry = {"version": self.version, "features": features}
+        path = self._features_path(key)
+        self._account(-self._file_size(path))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        self._account(self._file_size(path))
+        if embedding is not None:
+            self._write_embedding(key, embedding)
+        self.evict()
+
+    def put_embedding(self, key, embedding):
+        self._write_embedding(key, embedding)
+        self.evict()
+
+    def _write_embedding(self, key, embedding):
+        path = self._embedding_path(key)
+        self._account(-self._file_size(path))
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, np.asarray(embedding, dtype=np.float32))
+        os.replace(tmp_path, path)
+        self._account(self._file_size(path))
+
+    def discard(self, key):
+        for path in (self._features_path(key), self._embedding_path(key)):
+            size = self._file_size(path)
+            if size:
+                os.remove(path)
+                self._account(-size)
+
+    def evict(self):
+        """
+        Once the cache is over max_bytes, removes least recently used
+        entries until it is under low_water_bytes. A no-op (no directory
+        listing) while the accounted size is within the limit.
+        """
+        if self._current_size() <= self.max_bytes:
+            return
+        entries = {}
+        for name in os.listdir(self.text_dir):
+            key, ext = os.path.splitext(name)
+            if ext == ".json" and _KEY_RE.match(key):
+                entries[key] = (True, self._mtime(self._features_path(key)))
+        # Embeddings without features can never be read back; they go first
+        for name in os.listdir(self.embeddings_dir):
+            key, ext = os.path.splitext(name)
+            if ext == ".npy" and _KEY_RE.match(key) and key not in entries:
+                entries[key] = (False, self._mtime(self._embedding_path(key)))
+        for _, key in sorted((rank, key) for key, rank in entries.items()):
+            if self._size <= self.low_water_bytes:
+                break
+            self.discard(key)
+
+    def _current_size(self):
+        if self._size is None:
+            size = 0
+            for folder, ext in ((self.text_dir, ".json"), (self.embeddings_dir, ".npy")):
+                for name in os.listdir(folder):
+                    key, name_ext = os.path.splitext(name)
+                    if name_ext == ext and _KEY_RE.match(key):
+                        size += self._file_size(os.path.join(folder, name))
+            self._size = size
+        return self._size
+
+    def _account(self, delta):
+        if self._size is not None:
+            self._size += delta
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0.0
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
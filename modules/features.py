@@ -0,0 +1,61 @@
+# modules/features.py
+from config import PIPELINE_VERSION
+from modules import preprocessing, ner_extraction, skill_extraction
+from modules.document import ResumeDocument
+
+def feature_version():
+    """
+    Version tag for cached features: the pipeline version plus the skill
+    taxonomy, so editing either invalidates old cache entries.
+    """
+    return f"{PIPELINE_VERSION}-{skill_extraction.get_matcher().signature[:12]}"
+
+def extract_features(resume_text):
+    """
+    Job-independent features of one resume. The result is JSON-serializable
+    so it can be stored in the FeatureCache; the embedding is computed
+    separately in batches (see semantic.encode_texts).
+    """
+    return extract_features_batch([resume_text])[0]
+
+def features_from_duplicate(resume_text, duplicate):
+    """
+    Features of a near-duplicate of an already analysed resume. Only the
+    expensive parts are taken from `duplicate`: the lemmatized text and
+    the spaCy name (when the header is unchanged). Contact details,
+    education, experience and skills are recomputed on the new text, so
+    they always describe this file. The embedding is left to the caller.
+    """
+    doc = ResumeDocument(resume_text)
+    doc.processed = duplicate["processed"]
+    same_header = ResumeDocument(duplicate["text"]).header == doc.header
+    return {
+        "text": doc.text,
+        "processed": doc.processed,
+        "ner": {
+            "name": duplicate["ner"].get("name") if same_header else ner_extraction.extract_name(doc),
+            "email": ner_extraction.extract_email(doc),
+            "phone": ner_extraction.extract_phone(doc),
+            "education": ", ".join(ner_extraction.extract_education(doc)),
+            "experience": ner_extraction.extract_experience(doc),
+        },
+        "skills": skill_extraction.skills_from_matches(doc.skill_matches),
+        "skill_spans": [list(match) for match in doc.skill_matches],
+    }
+
+def extract_features_batch(resume_texts):
+    """extract_features for several resumes, lemmatized in one preprocess_batch call."""
+    docs = [ResumeDocument(resume_text) for resume_text in resume_texts]
+    for doc, processed in zip(docs, preprocessing.preprocess_batch([doc.text for doc in docs])):
+        doc.processed = processed
+
+    results = []
+    for doc in docs:
+        results.append({
+            "text": doc.text,
+            "processed": doc.processed,
+            "ner": ner_extraction.extract_ner_details(doc),
+            "skills": skill_extraction.skills_from_matches(doc.skill_matches),
+            "skill_spans": [list(match) for match in doc.skill_matches],
+        })
+    return results
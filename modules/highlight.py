@@ -1,28 +1,67 @@
+import html
 import re
+from functools import lru_cache
 
-def highlight_keywords(text, keywords):
+from modules import instrumentation
+
+@lru_cache(maxsize=64)
+def _keyword_pattern(keywords):
     """
-    Highlights all occurrences of keywords in the text using <mark>.
+    One combined, case-insensitive alternation for a set of keywords,
+    cached per keyword set. Longer keywords are tried first.
+    """
+    alternation = "|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf'(?<!\w)(?:{alternation})(?!\w)', flags=re.IGNORECASE)
+
+def find_keyword_spans(text, keywords):
+    """
+    Returns (keyword, start, end) spans for all keywords in a single regex pass.
     """
-    def replace(match):
-        return f"<mark>{match.group(0)}</mark>"
+    keywords = tuple(sorted({kw.lower() for kw in keywords if kw}))
+    if not keywords:
+        return []
+    return [(m.group(0).lower(), m.start(), m.end()) for m in _keyword_pattern(keywords).finditer(text)]
 
-    for kw in keywords:
-        pattern = re.compile(rf'\b{re.escape(kw)}\b', flags=re.IGNORECASE)
-        text = pattern.sub(replace, text)
-    return text
+def render_spans(text, spans, wrap):
+    """
+    Builds the highlighted HTML in one linear pass over the text.
+    spans: (key, start, end) tuples, e.g. skill_extraction.SkillMatch.
+    wrap: callable(escaped_match_text, key) -> HTML.
+    Text outside and inside the spans is HTML-escaped; overlapping spans are skipped.
+    """
+    parts = []
+    pos = 0
+    for key, start, end in sorted(spans, key=lambda span: (span[1], -span[2])):
+        if start < pos:
+            continue
+        parts.append(html.escape(text[pos:start]))
+        parts.append(wrap(html.escape(text[start:end]), key))
+        pos = end
+    parts.append(html.escape(text[pos:]))
+    return "".join(parts)
+
+@instrumentation.timed("highlight")
+def highlight_keywords(text, keywords, spans=None):
+    """
+    Highlights all occurrences of keywords in the text using <mark>.
+    spans: optional precomputed (keyword, start, end) matches.
+    """
+    if spans is None:
+        spans = find_keyword_spans(text, keywords)
+    return render_spans(text, spans, lambda match, key: f"<mark>{match}</mark>")
 
-def highlight_skills_intensity(text, skills_dict):
+@instrumentation.timed("highlight")
+def highlight_skills_intensity(text, skills_dict, spans=None):
     """
     Highlights skills in text with intensity based on relevance.
     skills_dict: {"python": 1.0, "nlp": 0.7}  # 1.0 = high relevance
+    spans: optional precomputed (skill, start, end) matches, e.g. from
+    skill_extraction.find_skills; otherwise the skills are matched here.
     """
-    def replace(match):
-        skill = match.group(0).lower()
+    def wrap(match, skill):
         intensity = int(skills_dict.get(skill, 0.5) * 255)
-        return f"<span style='background-color: rgba(255, {255-intensity}, 0, 0.5)'>{match.group(0)}</span>"
+        return f"<span style='background-color: rgba(255, {255-intensity}, 0, 0.5)'>{match}</span>"
 
-    for skill in skills_dict.keys():
-        pattern = re.compile(rf'\b{re.escape(skill)}\b', flags=re.IGNORECASE)
-        text = pattern.sub(replace, text)
-    return text
+    if spans is None:
+        spans = find_keyword_spans(text, skills_dict.keys())
+    return render_spans(text, spans, wrap)
@@ -0,0 +1,232 @@
+# modules/ingestion.py
+import itertools
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from config import DEDUP_ENABLED, INGEST_WORKERS, INGEST_CHUNK_SIZE, INGEST_START_METHOD
+from modules import instrumentation
+
+# signature: MinHash of the extracted text (dedup only); duplicate_of: the
+# feature cache key whose features were reused, or None
+IngestResult = namedtuple("IngestResult", ["index", "name", "features", "error", "signature", "duplicate_of"],
+                          defaults=(None, None))
+
+_with_features = True
+_dedup = DEDUP_ENABLED
+_duplicate_lookup = None  # (DuplicateIndex, FeatureCache), opened on first use in each process
+
+def _init_worker(with_features, threads_per_worker, metrics_enabled=False, dedup=DEDUP_ENABLED):
+    """
+    Runs once per worker process: loads spaCy, the skill matcher and the
+    SentenceTransformer from the model registry so every chunk handled by
+    this worker reuses them.
+    """
+    global _with_features, _dedup
+    _with_features = with_features
+    _dedup = dedup
+    instrumentation.enable(metrics_enabled)
+    if with_features:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+        from modules import features, models
+        models.warm_up()
+        features.feature_version()  # compiles the skill matcher
+
+def _reuse_duplicates(results):
+    """
+    Signs each parsed text with MinHash and, when the LSH index knows a
+    resume with the same or a near-identical text whose features are
+    still cached, reuses them instead of analysing the text again. An
+    exact match takes the whole feature dict; a near match only takes the
+    embedding and the lemmatized text, and recomputes the per-file fields
+    (features.features_from_duplicate).
+    """
+    global _duplicate_lookup
+    from modules import dedup, features
+    from modules.feature_cache import FeatureCache
+    if _duplicate_lookup is None:
+        _duplicate_lookup = (dedup.DuplicateIndex(), FeatureCache(version=features.feature_version()))
+    index, feature_cache = _duplicate_lookup
+
+    for i, result in enumerate(results):
+        if result.error is not None:
+            continue
+        with instrumentation.span("dedup"):
+            text = result.features["text"]
+            signature = dedup.minhash(text)
+            match = index.find(dedup.text_hash(text), signature) if signature is not None else None
+            cached = feature_cache.get(match[0]) if match else None
+        if cached is None:
+            results[i] = result._replace(signature=signature)
+            continue
+        key, _, exact = match
+        instrumentation.count("dedup_exact" if exact else "dedup_near")
+        if not exact:
+            embedding = cached.get("embedding")
+            cached = features.features_from_duplicate(text, cached)
+            cached["embedding"] = embedding
+        results[i] = result._replace(features=cached, signature=signature, duplicate_of=key)
+
+def _process_chunk(chunk, with_features, dedup=False):
+    """
+    Parses and analyses a chunk of (index, name, source) items. Per-file
+    failures are returned as errors instead of aborting the chunk.
+    """
+    from modules import parser
+    results = []
+    for index, name, source in chunk:
+        try:
+            text = parser.extract_text(source, name=name)
+            results.append(IngestResult(index, name, {"text": text}, None))
+        except Exception as e:
+            results.append(IngestResult(index, name, None, f"{type(e).__name__}: {e}"))
+
+    if with_features and dedup:
+        _reuse_duplicates(results)
+
+    if with_features:
+        # Lemmatize the whole chunk with one preprocess_batch call; if that
+        # fails, fall back to one resume at a time to isolate the failure
+        from modules import features
+        ok = [r for r in results if r.error is None and r.duplicate_of is None]
+        try:
+            chunk_features = features.extract_features_batch([r.features["text"] for r in ok])
+            for result, feats in zip(ok, chunk_features):
+                result.features.update(feats)
+        except Exception:
+            for i, result in enumerate(results):
+                if result.error is None and result.duplicate_of is None:
+                    try:
+                        result.features.update(features.extract_features(result.features["text"]))
+                    except Exception as e:
+                        results[i] = result._replace(features=None, error=f"{type(e).__name__}: {e}")
+
+        # One encoder call for the whole chunk
+        from modules import semantic
+        ok = [r for r in results if r.error is None and r.features.get("embedding") is None]
+        try:
+            embeddings = semantic.encode_texts([r.features["text"] for r in ok])
+            for result, embedding in zip(ok, embeddings):
+                result.features["embedding"] = embedding
+        except Exception as e:
+            # Only the resumes sent to the encoder failed; duplicates keep their reused embedding
+            error = f"{type(e).__name__}: {e}"
+            encoded = {r.index for r in ok}
+            results = [r._replace(features=None, error=error) if r.index in encoded else r for r in results]
+    return results
+
+def _run_chunk(chunk):
+    """_process_chunk in a worker; the worker's metrics are shipped back with the results."""
+    results = _process_chunk(chunk, _with_features, _dedup)
+    return results, instrumentation.drain() if instrumentation.is_enabled() else None
+
+def _chunks(items, chunk_size):
+    it = iter(enumerate(items))
+    while True:
+        chunk = [(index, name, source) for index, (name, source) in itertools.islice(it, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+def ingest(items, workers=None, chunk_size=INGEST_CHUNK_SIZE, max_in_flight=None, with_features=True,
+           dedup=DEDUP_ENABLED):
+    """
+    Parses resumes (and, with_features=True, extracts their features and
+    embeddings) on a process pool.
+
+    items: iterable of (name, source) where source is a file path or the
+        file's bytes. It is consumed lazily.
+    workers: number of processes; None picks up to INGEST_WORKERS based on
+        the number of items, 1 runs everything in the current process.
+    max_in_flight: chunks submitted or waiting to be yielded (default 2 per
+        worker), which bounds memory regardless of how many items there are.
+    dedup: with features, texts whose MinHash matches a resume in the
+        dedup.DuplicateIndex reuse its cached features (see
+        IngestResult.duplicate_of). Adding new signatures to the index is
+        up to the caller, once their features are cached.
+
+    Yields IngestResult(index, name, features, error) in input order. A
+    worker process dying fails the chunks in flight, not the batch.
+    """
+    if workers is None:
+        workers = INGEST_WORKERS
+        if hasattr(items, "__len__"):
+            workers = min(workers, -(-len(items) // chunk_size))
+    workers = max(1, workers)
+
+    if workers == 1:
+        for chunk in _chunks(items, chunk_size):
+            for result in _process_chunk(chunk, with_features, dedup):
+                if result.error:
+                    instrumentation.count("ingest_failures")
+                yield result
+        return
+
+    max_in_flight = max_in_flight or 2 * workers
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    context = multiprocessing.get_context(INGEST_START_METHOD)
+    chunks = _chunks(items, chunk_size)
+    in_flight = {}  # future -> (chunk, pool generation)
+    ready = {}  # index -> result, waiting for earlier indices
+    next_index = 0
+
+    def new_pool():
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=_init_worker,
+            initargs=(with_features, threads_per_worker, instrumentation.is_enabled(), dedup)
+        )
+
+    # A worker that dies hard (segfault, OOM kill) breaks the whole executor:
+    # its pending chunks fail and every later submit() raises. The pool is
+    # then replaced, and the chunks not submitted yet run on the new one.
+    pool, generation = new_pool(), 0
+
+    def restart_pool():
+        nonlocal pool, generation
+        pool.shutdown(wait=False, cancel_futures=True)
+        pool, generation = new_pool(), generation + 1
+        instrumentation.count("ingest_pool_restarts")
+
+    try:
+        exhausted = False
+        while in_flight or not exhausted:
+            # Results held back for ordering count against the in-flight limit
+            while not exhausted and len(in_flight) + -(-len(ready) // chunk_size) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    continue
+                try:
+                    future = pool.submit(_run_chunk, chunk)
+                except BrokenProcessPool:
+                    restart_pool()
+                    future = pool.submit(_run_chunk, chunk)
+                in_flight[future] = (chunk, generation)
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk, future_generation = in_flight.pop(future)
+                try:
+                    chunk_results, worker_metrics = future.result()
+                except Exception as e:  # worker crashed
+                    if isinstance(e, BrokenProcessPool) and future_generation == generation:
+                        restart_pool()
+                    error = f"{type(e).__name__}: {e}"
+                    chunk_results = [IngestResult(index, name, None, error) for index, name, _ in chunk]
+                    worker_metrics = None
+                if worker_metrics:
+                    instrumentation.merge(worker_metrics)
+                for result in chunk_results:
+                    if result.error:
+                        instrumentation.count("ingest_failures")
+                    ready[result.index] = result
+
+            # Yield in input order
+            while next_index in ready:
+                yield ready.pop(next_index)
+                next_index += 1
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,229 @@
+# modules/instrumentation.py
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from functools import wraps
+
+from config import LOG_DIR, METRICS_ENABLED, METRICS_FILE, PROFILE_DIR
+
+# Lightweight stage timings and counters.
+#
+#     with instrumentation.span("tfidf"):
+#         ...
+#     @instrumentation.timed("highlight")
+#     def highlight_skills_intensity(...): ...
+#     instrumentation.count("pages_parsed", len(pages))
+#
+# While disabled (the default), span() returns a shared no-op context
+# manager and count() returns immediately, so the only cost is one
+# function call, a context variable lookup and a flag check per use.
+#
+# Metrics go to the active Registry: the process-wide default, or the one
+# a thread selected with activate() (each app session keeps its own, so
+# sessions do not see or reset each other's metrics). New threads start
+# on the default, so background jobs activate their creator's registry.
+
+class Registry:
+    """Spans, counters and the last profile of one process or app session."""
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.spans = {}  # name -> [calls, total seconds, max seconds]
+        self.counters = {}  # name -> value
+        self.last_profile = None  # text summary of the last profiled batch
+
+_default = Registry()
+_active = contextvars.ContextVar("instrumentation_registry", default=_default)
+
+def registry():
+    """The active Registry of the current thread."""
+    return _active.get()
+
+def activate(reg):
+    """Makes `reg` the active Registry for the rest of the current thread."""
+    _active.set(reg)
+
+def enable(flag=True):
+    _active.get().enabled = bool(flag)
+
+def is_enabled():
+    return _active.get().enabled
+
+def reset():
+    reg = _active.get()
+    with reg.lock:
+        reg.spans.clear()
+        reg.counters.clear()
+
+def _record(name, elapsed):
+    reg = _active.get()
+    with reg.lock:
+        stats = reg.spans.get(name)
+        if stats is None:
+            reg.spans[name] = [1, elapsed, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+            if elapsed > stats[2]:
+                stats[2] = elapsed
+
+def count(name, value=1):
+    """Adds `value` to counter `name`."""
+    reg = _active.get()
+    if not reg.enabled:
+        return
+    with reg.lock:
+        reg.counters[name] = reg.counters.get(name, 0) + value
+
+# ---------------------------
+# Spans
+# ---------------------------
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _record(self.name, time.perf_counter() - self.start)
+        if exc_type is not None:
+            count(f"{self.name}_failures")
+        return False
+
+def span(name):
+    """Context manager timing one execution of stage `name`."""
+    return _Span(name) if _active.get().enabled else _NULL_SPAN
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _active.get().enabled:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# ---------------------------
+# Profiling
+# ---------------------------
+class profile:
+    """
+    Opt-in cProfile hook for one batch. With enabled=False (or metrics
+    disabled) it does nothing. Otherwise the stats are dumped to
+    PROFILE_DIR/<name>-<timestamp>.prof (readable with pstats or snakeviz)
+    and the top functions by cumulative time are kept in the active
+    registry's last_profile.
+    """
+
+    def __init__(self, name, enabled=True, top=25):
+        self.name = name
+        self.enabled = enabled
+        self.top = top
+        self._profiler = None
+        self.path = None
+
+    def __enter__(self):
+        if self.enabled and _active.get().enabled:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profiler is None:
+            return False
+        self._profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        self.path = os.path.join(PROFILE_DIR, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        self._profiler.dump_stats(self.path)
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(self.top)
+        _active.get().last_profile = out.getvalue()
+        return False
+
+# ---------------------------
+# Export
+# ---------------------------
+def snapshot():
+    """Current metrics as {"spans": {name: {...}}, "counters": {name: value}}."""
+    reg = _active.get()
+    with reg.lock:
+        spans = {
+            name: {"calls": calls, "total_s": total, "mean_ms": 1000 * total / calls, "max_ms": 1000 * longest}
+            for name, (calls, total, longest) in reg.spans.items()
+        }
+        return {"spans": spans, "counters": dict(reg.counters)}
+
+def drain():
+    """Returns the raw metrics collected so far and resets them (used to ship worker metrics)."""
+    reg = _active.get()
+    with reg.lock:
+        raw = {"spans": {name: list(stats) for name, stats in reg.spans.items()}, "counters": dict(reg.counters)}
+        reg.spans.clear()
+        reg.counters.clear()
+    return raw
+
+def merge(raw):
+    """Adds metrics returned by drain() in another process."""
+    reg = _active.get()
+    with reg.lock:
+        for name, (calls, total, longest) in raw["spans"].items():
+            stats = reg.spans.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += calls
+            stats[1] += total
+            stats[2] = max(stats[2], longest)
+        for name, value in raw["counters"].items():
+            reg.counters[name] = reg.counters.get(name, 0) + value
+
+def to_prometheus(metrics=None):
+    """Metrics in the Prometheus text exposition format."""
+    metrics = metrics or snapshot()
+    lines = [
+        "# TYPE resume_stage_seconds summary",
+    ]
+    for name, stats in sorted(metrics["spans"].items()):
+        lines.append(f'resume_stage_seconds_count{{stage="{name}"}} {stats["calls"]}')
+        lines.append(f'resume_stage_seconds_sum{{stage="{name}"}} {stats["total_s"]:.6f}')
+    lines.append("# TYPE resume_stage_max_seconds gauge")
+    for name, stats in sorted(metrics["spans"].items()):
+        lines.append(f'resume_stage_max_seconds{{stage="{name}"}} {stats["max_ms"] / 1000:.6f}')
+    lines.append("# TYPE resume_events_total counter")
+    for name, value in sorted(metrics["counters"].items()):
+        lines.append(f'resume_events_total{{event="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+def export(path=METRICS_FILE):
+    """
+    Writes the metrics to `path` (Prometheus text, e.g. for the node
+    exporter's textfile collector) and next to it as .json. Returns both paths.
+    """
+    metrics = snapshot()
+    os.makedirs(os.path.dirname(path) or LOG_DIR, exist_ok=True)
+    json_path = os.path.splitext(path)[0] + ".json"
+    for target, content in ((path, to_prometheus(metrics)), (json_path, json.dumps(metrics, indent=2))):
+        tmp_path = target + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, target)
+    return path, json_path
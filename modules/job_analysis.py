@@ -1,32 +1,38 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
 
-def generate_skill_gap_matrix(df, job_skills_list):
+def generate_skill_gap_matrix(df, job_skills_list, presence=None):
     """
     Generates a candidate vs job-skills matrix for skill matches (1=present, 0=absent)
+    presence: optional precomputed (len(df) x len(job_skills_list)) 0/1
+    array, e.g. ResumeFeatureTable.skill_presence for the displayed rows.
     """
     if df.empty:
         st.info("No data available for skill gap analysis.")
         return
 
-    candidates = df['Filename'].tolist()
-    skills = [skill.lower() for skill in job_skills_list]
-    matrix = pd.DataFrame(0, index=candidates, columns=skills)
+    # Repeated or empty key skills ("python, sql, python,") get one column
+    columns = [skill.strip().lower() for skill in job_skills_list]
+    skills = [skill for skill in dict.fromkeys(columns) if skill]
+    if presence is not None:
+        presence = np.asarray(presence)[:, [columns.index(skill) for skill in skills]]
+    else:
+        # One row per (candidate, skill) pair, then a single membership test
+        candidate_skills = df['Skills Found'].reset_index(drop=True).str.lower().str.split(",").explode().str.strip()
+        positions = pd.Index(skills).get_indexer(candidate_skills)
+        found = positions >= 0
+        presence = np.zeros((len(df), len(skills)), dtype=np.int8)
+        presence[candidate_skills.index[found], positions[found]] = 1
 
-    for idx, row in df.iterrows():
-        candidate_skills = [s.strip().lower() for s in row['Skills Found'].split(",")]
-        for skill in skills:
-            if skill in candidate_skills:
-                matrix.at[row['Filename'], skill] = 1
+    return pd.DataFrame(presence, index=df['Filename'].tolist(), columns=skills)
 
-    return matrix
-
-def show_skill_gap_heatmap(df, job_skills_list):
+def show_skill_gap_heatmap(df, job_skills_list, presence=None):
     """
     Displays an interactive heatmap of skill matches
     """
-    skill_matrix = generate_skill_gap_matrix(df, job_skills_list)
+    skill_matrix = generate_skill_gap_matrix(df, job_skills_list, presence)
     if skill_matrix is None or skill_matrix.empty:
         return
 
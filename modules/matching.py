@@ -1,19 +1,188 @@
+from collections import Counter
+
+import numpy as np
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 
-def compute_text_similarity(resume_text, job_desc_text):
-    vectorizer = TfidfVectorizer()
-    vectors = vectorizer.fit_transform([resume_text, job_desc_text])
-    return cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
+from modules import instrumentation
 
-def compute_weighted_score(resume_text, job_desc_text, skills_found, job_skills):
-    # Skills match ratio
-    skill_matches = len([skill for skill in skills_found if skill in job_skills])
-    skill_ratio = skill_matches / len(job_skills) if job_skills else 0
+class TfidfIndex:
+    """
+    Corpus-level TF-IDF index over a batch of resumes.
+
+    Raw term counts are kept as one sparse CSR matrix together with the
+    document frequencies, so new documents can be added without refitting
+    from scratch: only the new rows are tokenized and the IDF weights are
+    re-derived from the updated counts. Weighting matches sklearn's
+    TfidfVectorizer defaults (smooth idf, l2-normalized rows).
+    """
+
+    def __init__(self):
+        self._analyzer = TfidfVectorizer().build_analyzer()
+        self.vocabulary = {}
+        self.n_docs = 0
+        self._df = np.zeros(0, dtype=np.int64)
+        self._counts = []  # CSR blocks of raw counts, one per add_documents call
+        self._matrix = None  # cached tf-idf matrix of the stored rows
+
+    def fit(self, documents, reference_documents=()):
+        """
+        Fits the index on `documents` (stored as rows) and
+        `reference_documents` (e.g. the job description), which only
+        contribute to the document frequencies.
+        """
+        with instrumentation.span("tfidf"):
+            self.__init__()
+            self.add_documents(documents)
+            self.add_documents(reference_documents, store=False)
+        return self
+
+    def add_documents(self, documents, store=True):
+        """
+        Adds documents to the corpus and returns the row indices they were
+        stored at (empty when store=False).
+        """
+        counts = self._count(documents, grow=True)
+        if counts.shape[0] == 0:
+            return range(0)
+
+        df = np.bincount(counts.indices, minlength=len(self.vocabulary))
+        df[:len(self._df)] += self._df
+        self._df = df
+        self.n_docs += counts.shape[0]
+        self._matrix = None
+
+        if not store:
+            return range(0)
+        start = self.n_rows
+        self._counts.append(counts)
+        return range(start, start + counts.shape[0])
+
+    @property
+    def n_rows(self):
+        return sum(block.shape[0] for block in self._counts)
+
+    @property
+    def idf(self):
+        return np.log((1 + self.n_docs) / (1 + self._df)) + 1
+
+    @property
+    def matrix(self):
+        """TF-IDF matrix (CSR, one l2-normalized row per stored document)."""
+        if self._matrix is None:
+            self._matrix = self._weight(self._stored_counts())
+        return self._matrix
 
-    # Text similarity
-    text_similarity = compute_text_similarity(resume_text, job_desc_text)
+    def _stored_counts(self):
+        """Raw counts of the stored rows as one CSR matrix over the whole vocabulary."""
+        n_terms = len(self.vocabulary)
+        blocks = [
+            sp.csr_matrix((b.data, b.indices, b.indptr), shape=(b.shape[0], n_terms))
+            for b in self._counts
+        ]
+        counts = sp.vstack(blocks, format="csr") if blocks else sp.csr_matrix((0, n_terms))
+        self._counts = [counts] if blocks else []
+        return counts
 
-    # Weighted score
+    def transform(self, documents, unseen_terms=False):
+        """
+        TF-IDF vectors for documents using the current vocabulary and IDF.
+
+        unseen_terms=True keeps terms outside the vocabulary in each row's
+        l2 norm, weighted like a term no indexed document contains. They
+        cannot match anything, but a document is not scored as if it only
+        contained the indexed terms. This lets a frozen index (e.g. fitted
+        on job descriptions) score any number of documents with the same
+        weights.
+        """
+        if not unseen_terms:
+            return self._weight(self._count(documents, grow=False))
+        documents = list(documents)
+        counts = self._count(documents, grow=False)
+        weighted = counts.multiply(self.idf[:counts.shape[1]]).tocsr()
+        unseen_idf = np.log(1 + self.n_docs) + 1
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel() + [
+            unseen_idf ** 2 * sum(n * n for n in Counter(
+                term for term in self._analyzer(doc) if term not in self.vocabulary
+            ).values())
+            for doc in documents
+        ])
+        norms[norms == 0] = 1
+        return sp.diags(1 / norms) @ weighted
+
+    def similarities(self, query_text, rows=None):
+        """
+        Cosine similarity of every stored document (or only `rows`) against
+        `query_text`. The query counts as one more document for the IDF, as
+        if it had been passed to fit() in reference_documents (sklearn's
+        TfidfVectorizer fitted on the documents plus the query), and its
+        terms outside the vocabulary stay in its norm. The index itself is
+        not changed; the stored counts are re-weighted with one sparse pass.
+        """
+        with instrumentation.span("tfidf"):
+            counts = self._stored_counts()
+            if rows is not None:
+                counts = counts[rows]
+            terms = Counter(self._analyzer(query_text))
+            known = {self.vocabulary[term]: n for term, n in terms.items() if term in self.vocabulary}
+            unseen = [n for term, n in terms.items() if term not in self.vocabulary]
+
+            df = self._df.copy()
+            df[list(known)] += 1
+            n_docs = self.n_docs + 1
+            idf = np.log((1 + n_docs) / (1 + df)) + 1
+            unseen_idf = np.log((1 + n_docs) / 2) + 1
+
+            query = np.zeros(len(self.vocabulary))
+            query[list(known)] = list(known.values())
+            query *= idf
+            norm = np.sqrt(query @ query + unseen_idf ** 2 * sum(n * n for n in unseen))
+            if norm == 0 or counts.shape[0] == 0:
+                return np.zeros(counts.shape[0])
+            matrix = normalize(counts.multiply(idf[:counts.shape[1]]).tocsr(), norm="l2", copy=False)
+            return matrix @ (query[:counts.shape[1]] / norm)
+
+    def _count(self, documents, grow):
+        indptr, indices = [0], []
+        for doc in documents:
+            for term in self._analyzer(doc):
+                idx = self.vocabulary.get(term)
+                if idx is None:
+                    if not grow:
+                        continue
+                    idx = self.vocabulary[term] = len(self.vocabulary)
+                indices.append(idx)
+            indptr.append(len(indices))
+        counts = sp.csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), indices, indptr),
+            shape=(len(indptr) - 1, len(self.vocabulary))
+        )
+        counts.sum_duplicates()
+        return counts
+
+    def _weight(self, counts):
+        idf = self.idf
+        weighted = counts.multiply(idf[:counts.shape[1]]).tocsr()
+        return normalize(weighted, norm="l2", copy=False)
+
+def compute_skill_ratio(skills_found, job_skills):
+    skill_matches = len([skill for skill in skills_found if skill in job_skills])
+    return skill_matches / len(job_skills) if job_skills else 0
+
+def compute_weighted_score(skills_found, job_skills, text_similarity):
+    """
+    Weighted score for one resume. `text_similarity` is precomputed,
+    e.g. with TfidfIndex.similarities.
+    """
+    skill_ratio = compute_skill_ratio(skills_found, job_skills)
     final_score = 0.7 * skill_ratio + 0.3 * text_similarity
     return round(final_score, 2)
+
+def compute_weighted_scores(skill_ratios, text_similarities):
+    """
+    Vectorized compute_weighted_score for a whole batch of resumes.
+    """
+    skill_ratios = np.asarray(skill_ratios, dtype=np.float64)
+    text_similarities = np.asarray(text_similarities, dtype=np.float64)
+    return np.round(0.7 * skill_ratios + 0.3 * text_similarities, 2)
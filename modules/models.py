@@ -0,0 +1,59 @@
+# modules/models.py
+import threading
+
+from config import SPACY_MODEL, TRANSFORMER_MODEL
+
+# spaCy components each caller actually needs (en_core_web_sm names);
+# everything else in the pipeline is skipped for that call.
+LEMMA_PIPES = ("tok2vec", "tagger", "attribute_ruler", "lemmatizer")
+NER_PIPES = ("tok2vec", "ner")
+
+_lock = threading.Lock()
+_spacy_models = {}
+_encoders = {}
+
+def get_nlp(name=SPACY_MODEL):
+    """Shared spaCy pipeline, loaded on first use (one instance per model name)."""
+    nlp = _spacy_models.get(name)
+    if nlp is None:
+        with _lock:
+            nlp = _spacy_models.get(name)
+            if nlp is None:
+                import spacy
+                nlp = _spacy_models[name] = spacy.load(name)
+    return nlp
+
+def disabled_pipes(nlp, keep):
+    """Names of the pipeline components not listed in `keep`."""
+    return [pipe for pipe in nlp.pipe_names if pipe not in keep]
+
+def run_nlp(text, keep, name=SPACY_MODEL):
+    """Runs only the `keep` components of the shared pipeline on one text."""
+    nlp = get_nlp(name)
+    return next(nlp.pipe([text], disable=disabled_pipes(nlp, keep)))
+
+def pipe_nlp(texts, keep, batch_size=None, n_process=1, name=SPACY_MODEL):
+    """Streams texts through the `keep` components of the shared pipeline."""
+    nlp = get_nlp(name)
+    return nlp.pipe(texts, disable=disabled_pipes(nlp, keep), batch_size=batch_size, n_process=n_process)
+
+def get_encoder(name=TRANSFORMER_MODEL):
+    """Shared SentenceTransformer, loaded on first use (one instance per model name)."""
+    encoder = _encoders.get(name)
+    if encoder is None:
+        with _lock:
+            encoder = _encoders.get(name)
+            if encoder is None:
+                from sentence_transformers import SentenceTransformer
+                encoder = _encoders[name] = SentenceTransformer(name)
+    return encoder
+
+def warm_up(spacy=True, encoder=True):
+    """
+    Loads the models ahead of the first request and runs one tiny input
+    through each, so the first real call does not pay for initialization.
+    """
+    if spacy:
+        run_nlp("warm up", LEMMA_PIPES + NER_PIPES)
+    if encoder:
+        get_encoder().encode(["warm up"], convert_to_numpy=True)
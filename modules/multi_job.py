@@ -0,0 +1,109 @@
+# modules/multi_job.py
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from config import TOP_N_MATCHES, JOB_CACHE_SIZE
+from modules import preprocessing, semantic, skill_extraction
+from modules.matching import compute_weighted_scores
+from modules.retrieval import top_k_rows
+
+Job = namedtuple("Job", ["name", "text", "skills", "processed", "embedding"])
+JobMatches = namedtuple("JobMatches", ["scores", "skill_ratios", "text_similarities", "semantic_scores", "top"])
+
+# sha256(job text) -> (processed text, embedding, skills found in the text);
+# the same requisition is preprocessed, embedded and searched for skills
+# once no matter how often it is screened
+_job_cache = OrderedDict()
+_job_cache_lock = threading.Lock()
+
+def job_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def prepare_jobs(job_specs, preprocess=True):
+    """
+    job_specs: iterable of (name, text, skills); skills=None uses the
+    skills found in the description. Jobs that are not cached yet are
+    preprocessed with one preprocess_batch call and embedded with one
+    encoder call. preprocess=False skips lemmatization for callers that
+    only use the embeddings (Job.processed is then None unless cached).
+    Returns a list of Job.
+    """
+    job_specs = list(job_specs)
+    digests = [job_digest(text) for _, text, _ in job_specs]
+    with _job_cache_lock:
+        cached = {}
+        for digest in digests:
+            if digest in _job_cache:
+                _job_cache.move_to_end(digest)  # least recently used entries are evicted first
+                cached[digest] = _job_cache[digest]
+
+    texts = {digest: text for digest, (_, text, _) in zip(digests, job_specs)}
+    to_embed = {digest: text for digest, text in texts.items() if digest not in cached}
+    to_process = {digest: text for digest, text in texts.items()
+                  if preprocess and (digest not in cached or cached[digest][0] is None)}
+    if to_embed or to_process:
+        processed = dict(zip(to_process, preprocessing.preprocess_batch(to_process.values()))) if to_process else {}
+        embeddings = dict(zip(to_embed, semantic.encode_texts(to_embed.values()))) if to_embed else {}
+        with _job_cache_lock:
+            for digest in to_embed.keys() | to_process.keys():
+                old_processed, old_embedding, found_skills = cached.get(digest, (None, None, None))
+                entry = (processed.get(digest, old_processed), embeddings.get(digest, old_embedding), found_skills)
+                cached[digest] = _job_cache[digest] = entry
+                _job_cache.move_to_end(digest)
+            while len(_job_cache) > JOB_CACHE_SIZE:
+                _job_cache.popitem(last=False)
+
+    jobs = []
+    for digest, (name, text, skills) in zip(digests, job_specs):
+        processed, embedding, found_skills = cached[digest]
+        if skills is None:
+            if found_skills is None:
+                found_skills = [skill.strip().lower() for skill in skill_extraction.extract_skills(text)]
+                cached[digest] = (processed, embedding, found_skills)
+                with _job_cache_lock:
+                    if digest in _job_cache:
+                        _job_cache[digest] = cached[digest]
+            skills = found_skills
+        jobs.append(Job(name, text, [skill.strip().lower() for skill in skills], processed, embedding))
+    return jobs
+
+def skill_ratio_matrix(jobs, skill_vocab, skill_matrix):
+    """
+    M x N skill ratios: a sparse job x skill matrix times the transposed
+    candidate x skill matrix, divided by each job's number of key skills.
+    """
+    indptr, indices = [0], []
+    for job in jobs:
+        indices.extend(skill_vocab[skill] for skill in set(job.skills) if skill in skill_vocab)
+        indptr.append(len(indices))
+    job_matrix = sp.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), indices, indptr),
+        shape=(len(jobs), len(skill_vocab))
+    )
+    matches = (job_matrix @ skill_matrix.T.astype(np.float32)).toarray()
+    n_skills = np.array([len(job.skills) for job in jobs], dtype=np.float64)
+    return np.divide(matches, n_skills[:, None], out=np.zeros_like(matches, dtype=np.float64),
+                     where=n_skills[:, None] > 0)
+
+def match_jobs(table, jobs, top_k=TOP_N_MATCHES):
+    """
+    Scores every resume in a ResumeFeatureTable against every job at once.
+    Skill ratios, TF-IDF and semantic similarities are computed as M x N
+    matrix products; `top` maps each job name to its best (row, score) pairs.
+    """
+    skill_ratios = skill_ratio_matrix(jobs, table.skill_vocab, table.skill_matrix)
+    # Terms no resume contains stay in each job's norm, so scores are comparable across jobs
+    job_vectors = table.tfidf.transform([job.processed for job in jobs], unseen_terms=True)
+    text_similarities = (job_vectors @ table.tfidf.matrix.T).toarray()
+    semantic_scores = np.vstack([job.embedding for job in jobs]) @ table.embeddings.T
+    weighted_scores = compute_weighted_scores(skill_ratios, text_similarities)
+    scores = (0.7 * weighted_scores + 0.3 * semantic_scores).round(2)
+
+    top = {}
+    for job_idx, (job, rows) in enumerate(zip(jobs, top_k_rows(scores, top_k))):
+        top[job.name] = [(int(row), float(scores[job_idx, row])) for row in rows]
+    return JobMatches(scores, skill_ratios, text_similarities, semantic_scores, top)
@@ -1,49 +1,67 @@
-import spacy
 import re
 
-nlp = spacy.load("en_core_web_sm")
+from modules.document import ResumeDocument
 
 EDUCATION_KEYWORDS = [
     'bachelor', 'master', 'b.tech', 'm.tech', 'phd', 'b.sc', 'm.sc', 'btech', 'msc'
 ]
 
+EMAIL_RE = re.compile(r'\S+@\S+')
+PHONE_RE = re.compile(r'\+?\d[\d -]{8,12}\d')
+EXPERIENCE_RE = re.compile(r'(\d+)\+?\s+years?')
+# Lookahead so overlapping keywords are all found in a single scan
+EDUCATION_RE = re.compile("(?=(" + "|".join(re.escape(word) for word in EDUCATION_KEYWORDS) + "))")
+
+# Every extractor takes the resume text or a ResumeDocument; passing the same
+# ResumeDocument to all of them shares the lowercased text and the NER pass.
+
 def extract_email(text):
-    emails = re.findall(r'\S+@\S+', text)
-    return emails[0] if emails else None
+    match = EMAIL_RE.search(ResumeDocument.of(text).text)
+    return match.group(0) if match else None
 
 def extract_phone(text):
-    phones = re.findall(r'\+?\d[\d -]{8,12}\d', text)
-    return phones[0] if phones else None
+    match = PHONE_RE.search(ResumeDocument.of(text).text)
+    return match.group(0) if match else None
 
 def extract_name(text):
-    doc = nlp(text)
-    for ent in doc.ents:
+    doc = ResumeDocument.of(text)
+    for ent in doc.header_doc.ents:
         if ent.label_ == "PERSON":
             return ent.text
     return None
 
 def extract_education(text):
-    text_lower = text.lower()
-    edu = [word.upper() if '.' not in word else word.title() for word in EDUCATION_KEYWORDS if word in text_lower]
+    found = {match.group(1) for match in EDUCATION_RE.finditer(ResumeDocument.of(text).lower)}
+    edu = [word.upper() if '.' not in word else word.title() for word in EDUCATION_KEYWORDS if word in found]
     return edu
 
+def education_pattern(options):
+    """
+    Regex matching an education string that mentions any of `options`
+    (case-insensitive substring); the in-memory education filter. For the
+    app's options it agrees with CandidateStore.query, which looks up the
+    same lowercased degrees in its education table.
+    """
+    return "(?i)" + "|".join(re.escape(option) for option in options)
+
 def extract_experience(text):
     """
     Returns experience as float (years) if found, else 0.
     """
-    exp = re.findall(r'(\d+)\+?\s+years?', text.lower())
-    if exp:
+    match = EXPERIENCE_RE.search(ResumeDocument.of(text).lower)
+    if match:
         try:
-            return float(exp[0])
+            return float(match.group(1))
         except ValueError:
             return 0.0
     return 0.0
 
 def extract_ner_details(text):
+    doc = ResumeDocument.of(text)
     return {
-        "name": extract_name(text),
-        "email": extract_email(text),
-        "phone": extract_phone(text),
-        "education": ", ".join(extract_education(text)),
-        "experience": extract_experience(text)
+        "name": extract_name(doc),
+        "email": extract_email(doc),
+        "phone": extract_phone(doc),
+        "education": ", ".join(extract_education(doc)),
+        "experience": extract_experience(doc)
     }
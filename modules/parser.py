@@ -1,49 +1,141 @@
-import pdfplumber
-from docx import Document
 import io
 
-def extract_text_from_pdf(file):
+from config import PARSE_MAX_CHARS, PARSE_MAX_PAGES
+from modules import instrumentation
+
+# One extraction stack for the app, the ingestion workers and the batch
+# CLI. PDFs go through PyMuPDF, reading the upload's existing buffer
+# (no BytesIO(file.read()) copy); pdfplumber is only used when PyMuPDF
+# fails or finds no text. Pages are produced lazily, so the page and
+# character caps stop parsing early instead of truncating afterwards.
+
+def _file_name(file, name=None):
+    if name:
+        return name
+    if isinstance(file, str):
+        return file
+    return getattr(file, "name", "")  # UploadedFile has .name
+
+def _buffer(file):
     """
-    file: can be a path (str) or a Streamlit UploadedFile object
+    The file's bytes without copying: raw bytes as is, the internal buffer
+    of a BytesIO / Streamlit UploadedFile, or None for a path.
     """
-    text = ""
-    if hasattr(file, "read"):  # UploadedFile
-        with pdfplumber.open(io.BytesIO(file.read())) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-    else:  # file path
-        with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-    return text
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return file
+    if hasattr(file, "getbuffer"):
+        return file.getbuffer()
+    if hasattr(file, "read"):
+        file.seek(0)
+        return file.read()
+    return None
+
+def _pymupdf_pages(file, max_pages):
+    import pymupdf
+    buffer = _buffer(file)
+    doc = pymupdf.open(file) if buffer is None else pymupdf.open(stream=buffer, filetype="pdf")
+    try:
+        for page_no in range(min(len(doc), max_pages) if max_pages else len(doc)):
+            yield doc[page_no].get_text()
+    finally:
+        doc.close()
+        if isinstance(buffer, memoryview) and buffer is not file:
+            buffer.release()
 
-def extract_text_from_docx(file):
+def _pdfplumber_pages(file, max_pages, start=0):
+    import pdfplumber
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        file = io.BytesIO(file)
+    elif hasattr(file, "seek"):
+        file.seek(0)
+    with pdfplumber.open(file) as pdf:
+        for page in pdf.pages[start:max_pages] if max_pages else pdf.pages[start:]:
+            yield page.extract_text() or ""
+
+def iter_pdf_pages(file, max_pages=PARSE_MAX_PAGES):
     """
-    file: can be a path (str) or a Streamlit UploadedFile object
+    Yields the text of each page (at most max_pages). Falls back to
+    pdfplumber when PyMuPDF cannot open the file or extracts no text,
+    and for the remaining pages when it fails partway through.
     """
-    if hasattr(file, "read"):  # UploadedFile
-        file_stream = io.BytesIO(file.read())
-        doc = Document(file_stream)
-    else:  # file path
-        doc = Document(file)
-    return "\n".join([para.text for para in doc.paragraphs])
+    held = []  # leading blank pages, yielded once PyMuPDF finds text
+    yielded = 0
+    try:
+        for page_text in _pymupdf_pages(file, max_pages):
+            instrumentation.count("pages_parsed")
+            if not yielded and not page_text.strip():
+                held.append(page_text)
+                continue
+            for text in held + [page_text]:
+                yielded += 1
+                yield text
+            held = []
+    except Exception:
+        pass
+    else:
+        if yielded:
+            return
+    instrumentation.count("parser_fallbacks")
+    # Every page is yielded once: pdfplumber picks up after the pages PyMuPDF already produced
+    for page_text in _pdfplumber_pages(file, max_pages, start=yielded):
+        instrumentation.count("pages_parsed")
+        yield page_text
+
+def iter_docx_paragraphs(file):
+    from docx import Document
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        file = io.BytesIO(file)
+    elif hasattr(file, "seek"):
+        file.seek(0)
+    for para in Document(file).paragraphs:
+        yield para.text
 
-def extract_text(file):
+def iter_pages(file, name=None, max_pages=PARSE_MAX_PAGES):
     """
-    Automatically detect file type and extract text.
-    Supports PDF and DOCX.
+    Streams text from a resume: one item per page for PDF, per paragraph
+    for DOCX. file: a path, a Streamlit UploadedFile / BytesIO, or raw
+    bytes (pass `name` so the type can be detected).
     """
-    filename = getattr(file, "name", "")  # UploadedFile has .name
-    if isinstance(file, str):
-        filename = file
+    filename = _file_name(file, name).lower()
+    if filename.endswith(".pdf"):
+        return iter_pdf_pages(file, max_pages)
+    if filename.endswith(".docx"):
+        return iter_docx_paragraphs(file)
+    return iter(())
 
-    if filename.lower().endswith(".pdf"):
-        return extract_text_from_pdf(file)
-    elif filename.lower().endswith(".docx"):
-        return extract_text_from_docx(file)
+def _join(parts, max_chars):
+    """Joins streamed text parts with newlines, stopping once max_chars is reached."""
+    texts, n_chars = [], 0
+    for part in parts:
+        texts.append(part)
+        n_chars += len(part) + 1
+        if max_chars and n_chars >= max_chars:
+            break
+    text = "\n".join(texts)
+    return text[:max_chars] if max_chars else text
+
+def extract_text_from_pdf(file, max_pages=PARSE_MAX_PAGES, max_chars=PARSE_MAX_CHARS):
+    """
+    file: can be a path (str), a Streamlit UploadedFile object or bytes
+    """
+    return _join((page for page in iter_pdf_pages(file, max_pages) if page), max_chars)
+
+def extract_text_from_docx(file, max_chars=PARSE_MAX_CHARS):
+    """
+    file: can be a path (str), a Streamlit UploadedFile object or bytes
+    """
+    return _join(iter_docx_paragraphs(file), max_chars)
+
+@instrumentation.timed("parser")
+def extract_text(file, name=None, max_pages=PARSE_MAX_PAGES, max_chars=PARSE_MAX_CHARS):
+    """
+    Automatically detect file type and extract text.
+    Supports PDF and DOCX. Raw bytes need `name` to detect the type.
+    """
+    filename = _file_name(file, name).lower()
+    if filename.endswith(".pdf"):
+        return extract_text_from_pdf(file, max_pages, max_chars)
+    elif filename.endswith(".docx"):
+        return extract_text_from_docx(file, max_chars)
     else:
         return ""
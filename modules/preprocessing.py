@@ -1,18 +1,88 @@
-import spacy
+from collections import OrderedDict
 from nltk.corpus import stopwords
 import re
+import threading
+
+from config import PREPROCESS_BATCH_SIZE, PREPROCESS_N_PROCESS, PREPROCESS_CACHE_SIZE
+from modules import instrumentation
+from modules.models import run_nlp, pipe_nlp, LEMMA_PIPES
 
-nlp = spacy.load("en_core_web_sm")
 stop_words = set(stopwords.words('english'))
 
+# LRU cache of cleaned text -> lemmatized text, so repeated inputs (e.g. the
+# same job description on every rerun) skip tokenization and lemmatization
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _cache_get(key):
+    with _cache_lock:
+        value = _cache.get(key)
+        if value is not None:
+            _cache.move_to_end(key)
+        return value
+
+def _cache_put(key, value):
+    with _cache_lock:
+        _cache[key] = value
+        _cache.move_to_end(key)
+        while len(_cache) > PREPROCESS_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def clear_cache():
+    """Empties the preprocessing cache (e.g. to time cold runs)."""
+    with _cache_lock:
+        _cache.clear()
+
+def cache_size():
+    """Number of texts in the preprocessing cache."""
+    with _cache_lock:
+        return len(_cache)
+
 def clean_text(text):
     text = text.lower()
     text = re.sub(r'\s+', ' ', text)
     text = re.sub(r'[^a-zA-Z ]', '', text)
     return text
 
-def preprocess_text(text):
-    text = clean_text(text)
-    doc = nlp(text)
+def _lemmatize(doc):
     tokens = [token.lemma_ for token in doc if token.is_alpha and token.text not in stop_words]
     return " ".join(tokens)
+
+def preprocess_text(text):
+    text = clean_text(text)
+    processed = _cache_get(text)
+    if processed is None:
+        instrumentation.count("preprocess_cache_misses")
+        with instrumentation.span("spacy.lemmatize"):
+            doc = run_nlp(text, LEMMA_PIPES)
+            processed = _lemmatize(doc)
+        instrumentation.count("tokens_processed", len(doc))
+        _cache_put(text, processed)
+    else:
+        instrumentation.count("preprocess_cache_hits")
+    return processed
+
+def preprocess_batch(texts, batch_size=PREPROCESS_BATCH_SIZE, n_process=PREPROCESS_N_PROCESS):
+    """
+    Corpus-level preprocess_text: cached and duplicate texts are resolved
+    up front and the rest is streamed through nlp.pipe, with only the
+    lemmatization components enabled. Returns results in input order.
+    """
+    cleaned = [clean_text(text) for text in texts]
+    results = [_cache_get(text) for text in cleaned]
+    pending = list(dict.fromkeys(text for text, result in zip(cleaned, results) if result is None))
+
+    instrumentation.count("preprocess_cache_hits", len(cleaned) - len(pending))
+    instrumentation.count("preprocess_cache_misses", len(pending))
+    if pending:
+        processed, n_tokens = {}, 0
+        with instrumentation.span("spacy.lemmatize"):
+            docs = pipe_nlp(pending, LEMMA_PIPES, batch_size=batch_size, n_process=n_process)
+            for text, doc in zip(pending, docs):
+                processed[text] = _lemmatize(doc)
+                n_tokens += len(doc)
+        instrumentation.count("tokens_processed", n_tokens)
+        for text, value in processed.items():
+            _cache_put(text, value)
+        results = [processed[text] if result is None else result for text, result in zip(cleaned, results)]
+    return results
@@ -0,0 +1,141 @@
+# modules/quantization.py
+import os
+import threading
+
+import numpy as np
+
+from config import RERANK_DEPTH
+from modules.retrieval import top_k
+
+KINDS = ("float16", "int8")
+
+# .npz path -> QuantizedMatrix loaded or built by this process; reused while
+# it matches the store's generation instead of being read from disk per query
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+def quantize(vectors, kind):
+    """
+    Compresses float32 rows. Returns (codes, scales): float16 codes with
+    no scales, or int8 codes with one float32 scale per row
+    (row ~= codes * scale).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if kind == "float16":
+        return vectors.astype(np.float16), None
+    if kind == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown quantization kind: {kind}")
+
+class QuantizedMatrix:
+    """
+    In-memory quantized copy of an embedding matrix (2 bytes per value for
+    float16, 1 byte plus a per-row scale for int8). Searches score every
+    row in the compressed space, then re-rank the best `rerank` rows
+    against the full-precision vectors, which stay on disk (memory-mapped)
+    and are only read for those rows.
+    """
+
+    def __init__(self, kind, codes, scales=None):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown quantization kind: {kind}")
+        self.kind = kind
+        self.codes = codes
+        self.scales = scales
+        self.source_id = None  # EmbeddingStore.generation the codes were built from
+
+    @property
+    def n_rows(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    @classmethod
+    def build(cls, vectors, kind, chunk_rows=65536):
+        codes, scales = [], []
+        for start in range(0, len(vectors), chunk_rows):
+            block_codes, block_scales = quantize(vectors[start:start + chunk_rows], kind)
+            codes.append(block_codes)
+            scales.append(block_scales)
+        dim = vectors.shape[1]
+        if not codes:
+            codes, scales = [np.zeros((0, dim), dtype=kind)], [np.zeros(0, dtype=np.float32)]
+        return cls(kind, np.concatenate(codes), None if kind == "float16" else np.concatenate(scales))
+
+    def extend(self, vectors, start_row):
+        """Quantizes rows appended to the matrix since the codes were built."""
+        new = QuantizedMatrix.build(vectors[start_row:], self.kind)
+        self.codes = np.concatenate([self.codes[:start_row], new.codes])
+        if self.scales is not None:
+            self.scales = np.concatenate([self.scales[:start_row], new.scales])
+
+    def scores(self, query, chunk_rows=65536):
+        """Approximate similarity of every row to `query`, in chunks (no BLAS for int8 / float16)."""
+        query = np.asarray(query, dtype=np.float32)
+        out = np.empty(self.n_rows, dtype=np.float32)
+        for start in range(0, self.n_rows, chunk_rows):
+            out[start:start + chunk_rows] = self.codes[start:start + chunk_rows].astype(np.float32) @ query
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    def search(self, vectors, query, k, mask=None, rerank=RERANK_DEPTH):
+        """
+        Top-k rows: the best max(k, rerank) by quantized score, re-scored
+        exactly against `vectors`. Returns (rows, scores) like
+        retrieval.exact_search.
+        """
+        candidates = np.sort(top_k(self.scores(query), max(k, rerank), mask))
+        exact = np.asarray(vectors[candidates] @ query, dtype=np.float32)
+        best = top_k(exact, k)
+        return candidates[best], exact[best]
+
+    def save(self, path):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, codes=self.codes,
+                 scales=np.zeros(0, dtype=np.float32) if self.scales is None else self.scales,
+                 source_id=np.int64(-1 if self.source_id is None else self.source_id))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            codes = data["codes"]
+            kind = "int8" if codes.dtype == np.int8 else "float16"
+            matrix = cls(kind, codes, data["scales"] if kind == "int8" else None)
+            source_id = int(data["source_id"])
+        matrix.source_id = None if source_id < 0 else source_id
+        return matrix
+
+def load_quantized(store, kind):
+    """
+    Loads the quantized copy of the store's matrix persisted next to it,
+    rebuilding it after compaction and quantizing rows appended since it
+    was saved (same lifecycle as retrieval.load_ivf_index). The copy is
+    kept in memory, so later calls for the same store generation skip the
+    disk.
+    """
+    path = os.path.splitext(store.matrix_path)[0] + f".{kind}.npz"
+    source_id = store.generation
+    with _loaded_lock:
+        matrix = _loaded.get(path)
+        if matrix is None and os.path.exists(path):
+            matrix = QuantizedMatrix.load(path)
+        if matrix is not None and (matrix.kind != kind or matrix.source_id != source_id
+                                   or matrix.n_rows > store.n_rows):
+            matrix = None
+
+        if matrix is None:
+            matrix = QuantizedMatrix.build(store.vectors, kind)
+            matrix.source_id = source_id
+            matrix.save(path)
+        elif matrix.n_rows < store.n_rows:
+            matrix.extend(store.vectors, matrix.n_rows)
+            matrix.save(path)
+        _loaded[path] = matrix
+    return matrix
@@ -1,48 +1,237 @@
 # modules/report.py
-import pdfkit
+import base64
+import hashlib
+import html
 import os
-import streamlit as st
+import tempfile
+import threading
 
-def generate_full_report(df, job_skills_list, report_name="Full_Resume_Report.pdf"):
+import pandas as pd
+
+from config import REPORT_CHART_DIR, REPORT_CHART_MAX_SETS, REPORT_TOP_K
+from modules import instrumentation
+
+# ---------------------------
+# Charts
+# ---------------------------
+def dataset_hash(df, job_skills_list, top_k=REPORT_TOP_K):
+    """Hash of the columns and settings the charts are drawn from, used as the chart cache key."""
+    columns = [col for col in ("Filename", "Score", "experience", "Skills Found") if col in df.columns]
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df[columns], index=False).values.tobytes())
+    digest.update("\0".join(job_skills_list).encode("utf-8"))
+    digest.update(f"\0top_k={top_k}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def _save(fig, path):
+    tmp_path = path + ".tmp.png"
+    fig.savefig(tmp_path, format="png", dpi=100, bbox_inches="tight")
+    os.replace(tmp_path, path)
+
+def _skills_chart(df, path):
+    from matplotlib.figure import Figure
+    from modules import dashboard
+    counts = dashboard.count_skills(df)
+    fig = Figure(figsize=(8, 3.5))
+    ax = fig.subplots()
+    ax.bar(counts.index, counts.values)
+    ax.set_title("Skills Distribution Across Candidates")
+    ax.tick_params(axis="x", labelrotation=45)
+    _save(fig, path)
+
+def _histogram(values, title, xlabel, path):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(8, 3))
+    ax = fig.subplots()
+    ax.hist(values, bins=20)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    _save(fig, path)
+
+def _heatmap(df, job_skills_list, path):
+    from matplotlib.figure import Figure
+    from modules import job_analysis
+    matrix = job_analysis.generate_skill_gap_matrix(df, job_skills_list)
+    fig = Figure(figsize=(8, max(2.0, 0.25 * len(matrix) + 1)))
+    ax = fig.subplots()
+    ax.imshow(matrix.values, cmap="Blues", aspect="auto", vmin=0, vmax=1)
+    ax.set_xticks(range(len(matrix.columns)), matrix.columns, rotation=45, ha="right")
+    ax.set_yticks(range(len(matrix.index)), matrix.index, fontsize=7)
+    ax.set_title("Candidate vs Job Skills (top candidates)")
+    _save(fig, path)
+
+def evict_charts(chart_dir=REPORT_CHART_DIR, max_sets=REPORT_CHART_MAX_SETS):
+    """Removes the least recently used chart sets until at most max_sets remain."""
+    sets = {}
+    for name in os.listdir(chart_dir):
+        key, sep, rest = name.partition("-")
+        if not sep or not rest.endswith(".png"):
+            continue
+        path = os.path.join(chart_dir, name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        last_used, paths = sets.setdefault(key, (0.0, []))
+        sets[key] = (max(last_used, mtime), paths + [path])
+    for _, paths in sorted(sets.values())[:max(0, len(sets) - max_sets)]:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def render_charts(df, job_skills_list, top_k=REPORT_TOP_K, chart_dir=REPORT_CHART_DIR):
+    """
+    Static PNG versions of the dashboard and skill gap charts, rendered
+    once per dataset and reused from chart_dir afterwards.
+    Returns [(title, png path)].
+    """
+    os.makedirs(chart_dir, exist_ok=True)
+    key = dataset_hash(df, job_skills_list, top_k)
+    charts = [
+        ("Skills Distribution", "skills", lambda path: _skills_chart(df, path)),
+        ("Experience Distribution", "experience",
+         lambda path: _histogram(df['experience'], "Experience Distribution", "Years", path)),
+        ("Weighted Score Distribution", "score",
+         lambda path: _histogram(df['Score'], "Weighted Score Distribution", "Score", path)),
+        ("Skill Gap Heatmap", "heatmap", lambda path: _heatmap(df.head(top_k), job_skills_list, path)),
+    ]
+    rendered = []
+    for title, name, draw in charts:
+        path = os.path.join(chart_dir, f"{key}-{name}.png")
+        if os.path.exists(path):
+            os.utime(path)  # mark as recently used
+        else:
+            draw(path)
+        rendered.append((title, path))
+    evict_charts(chart_dir)
+    return rendered
+
+# ---------------------------
+# HTML
+# ---------------------------
+TABLE_COLUMNS = ["Filename", "Score", "experience", "Experience Level", "education", "Skills Found"]
+
+def _image_tag(path):
+    with open(path, "rb") as f:
+        data = base64.b64encode(f.read()).decode("ascii")
+    return f'<img src="data:image/png;base64,{data}" style="max-width: 100%">'
+
+def _table_rows(df, columns, chunk_rows=500):
+    """<tr> rows of `df`, built chunk_rows at a time."""
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        cells = [chunk[col].astype(str).map(html.escape).to_numpy() for col in columns]
+        yield "".join(
+            "<tr>" + "".join(f"<td>{value}</td>" for value in row) + "</tr>\n"
+            for row in zip(*cells)
+        )
+
+def write_report_html(df, job_skills_list, path, top_k=REPORT_TOP_K, chart_dir=REPORT_CHART_DIR):
     """
-    Generates a PDF combining top resumes, dashboard, and heatmap,
-    and provides a Streamlit download button.
+    Streams the report HTML to `path`: the top_k candidates with their
+    highlighted resumes, a compact table of everyone else, and the
+    dashboard / heatmap charts as embedded images. The file is written
+    to a temp file next to `path` and moved into place when complete.
     """
-    html_content = "<h1>Resume Scanner Report</h1>"
+    with instrumentation.span("export.report_html"):
+        ranked = df.sort_values("Score", ascending=False, kind="stable")
+        top, rest = ranked.head(top_k), ranked.iloc[top_k:]
+        columns = [col for col in TABLE_COLUMNS if col in ranked.columns]
 
-    # Top candidates
-    html_content += "<h2>Top Candidates</h2>"
-    for idx, row in df.iterrows():
-        html_content += f"<h3>{row['Filename']} (Score: {row['Score']})</h3>"
-        html_content += f"<p>Experience: {row['experience']} yrs, Level: {row['Experience Level']}</p>"
-        html_content += row['Highlighted Resume']
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".html",
+                                         delete=False) as f:
+            f.write("<html><head><meta charset='utf-8'>"
+                    "<style>table{border-collapse:collapse;font-size:11px}"
+                    "td,th{border:1px solid #ccc;padding:2px 6px}</style></head><body>\n")
+            f.write("<h1>Resume Scanner Report</h1>\n")
+            f.write(f"<p>{len(ranked)} candidates. Job skills: {html.escape(', '.join(job_skills_list))}</p>\n")
 
-    # Dashboard charts
-    html_content += "<h2>Analytics Dashboard</h2>"
-    html_content += "<p>Charts and visualizations exported as images</p>"
+            # Top candidates
+            f.write(f"<h2>Top {len(top)} Candidates</h2>\n")
+            for _, row in top.iterrows():
+                f.write(f"<h3>{html.escape(str(row['Filename']))} (Score: {row['Score']})</h3>\n")
+                f.write(f"<p>Experience: {row['experience']} yrs, Level: {row['Experience Level']}</p>\n")
+                if 'Highlighted Resume' in row:
+                    f.write(row['Highlighted Resume'])
+                    f.write("\n")
 
-    # Skill Gap Heatmap
-    html_content += "<h2>Skill Gap Heatmap</h2>"
-    html_content += "<p>Heatmap exported as image</p>"
+            # Everyone else
+            if len(rest):
+                f.write(f"<h2>Other Candidates ({len(rest)})</h2>\n<table>\n<tr>")
+                f.write("".join(f"<th>{html.escape(col)}</th>" for col in columns))
+                f.write("</tr>\n")
+                for rows in _table_rows(rest, columns):
+                    f.write(rows)
+                f.write("</table>\n")
 
-    # Generate PDF
-    try:
-        pdfkit.from_string(html_content, report_name)
-        pdf_path = os.path.abspath(report_name)
+            # Dashboard charts and heatmap
+            f.write("<h2>Analytics Dashboard</h2>\n")
+            for title, chart_path in render_charts(ranked, job_skills_list, top_k, chart_dir):
+                f.write(f"<h3>{title}</h3>\n{_image_tag(chart_path)}\n")
+            f.write("</body></html>\n")
+        os.replace(f.name, path)
+    return path
+
+# ---------------------------
+# PDF
+# ---------------------------
+class ReportJob:
+    """
+    Converts a report's HTML to PDF on a background thread, so the app
+    stays responsive while wkhtmltopdf runs. Poll `done`, then read
+    `pdf_path` (or `error` if the conversion failed).
+    """
 
-        st.success(f"Report successfully generated: {pdf_path}")
+    def __init__(self, html_path, pdf_path, configuration=None):
+        self.html_path = html_path
+        self.pdf_path = pdf_path
+        self.configuration = configuration
+        self.error = None
+        self._metrics = instrumentation.registry()
+        self._thread = threading.Thread(target=self._run, name="report-pdf", daemon=True)
 
-        # Show download button in Streamlit
-        with open(pdf_path, "rb") as f:
-            st.download_button(
-                label="Download Full Resume Report",
-                data=f,
-                file_name=report_name,
-                mime="application/pdf"
-            )
+    def _run(self):
+        import pdfkit
+        instrumentation.activate(self._metrics)
+        try:
+            with instrumentation.span("export.report_pdf"):
+                tmp_path = self.pdf_path + ".tmp.pdf"
+                pdfkit.from_file(self.html_path, tmp_path, configuration=self.configuration)
+                os.replace(tmp_path, self.pdf_path)
+        except Exception as e:
+            instrumentation.count("export_failures")
+            self.error = f"{type(e).__name__}: {e}"
 
-        return pdf_path
+    def start(self):
+        self._thread.start()
+        return self
 
-    except Exception as e:
-        st.error(f"Error generating report: {e}")
-        return None
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.done
+
+def start_full_report(df, job_skills_list, report_name="Full_Resume_Report.pdf", configuration=None,
+                      top_k=REPORT_TOP_K):
+    """Writes the report HTML now and starts its PDF conversion in the background. Returns the ReportJob."""
+    html_path = os.path.splitext(report_name)[0] + ".html"
+    write_report_html(df, job_skills_list, html_path, top_k)
+    return ReportJob(html_path, report_name, configuration).start()
+
+def generate_full_report(df, job_skills_list, report_name="Full_Resume_Report.pdf", configuration=None,
+                         top_k=REPORT_TOP_K):
+    """
+    Generates a PDF combining the top resumes, a table of the other
+    candidates, the dashboard charts and the heatmap, and waits for it.
+    Returns the PDF path, or None if the conversion failed (use
+    start_full_report for the ReportJob and its error).
+    """
+    job = start_full_report(df, job_skills_list, report_name, configuration, top_k)
+    job.wait()
+    return None if job.error else os.path.abspath(job.pdf_path)
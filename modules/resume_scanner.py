@@ -1,58 +1,63 @@
 # resume_scanner.py
 
 import os
+import sys
 import glob
-import fitz  # PyMuPDF for PDF text extraction
-import docx2txt  # For DOCX
-from sentence_transformers import SentenceTransformer, util
+import json
+import heapq
+import hashlib
+import argparse
+import numpy as np
 from config import (
     RAW_RESUME_DIR,
     EXTRACTED_TEXT_DIR,
-    EMBEDDINGS_DIR,
-    TRANSFORMER_MODEL,
     SIMILARITY_THRESHOLD,
     TOP_N_MATCHES,
+    DB_URI,
+    ANN_MIN_CORPUS,
+    EMBEDDING_STORAGE,
+    PIPELINE_VERSION,
+    DEDUP_ENABLED,
+    ALLOWED_EXTENSIONS,
     ensure_dirs
 )
-import pickle
+from modules import dedup, experience_level, instrumentation, parser, semantic
+from modules.candidate_store import CandidateStore, job_key, text_hash
+from modules.embedding_store import EmbeddingStore
+from modules.ingestion import ingest
+from modules.matching import TfidfIndex, compute_skill_ratio, compute_weighted_score
+from modules.multi_job import prepare_jobs
+from modules.quantization import load_quantized
+from modules.retrieval import exact_search, load_ivf_index, top_k_rows
 
 # Ensure directories exist
 ensure_dirs()
 
-# Load embedding model
-print("[INFO] Loading embedding model...")
-model = SentenceTransformer(TRANSFORMER_MODEL)
-
 # ---------------------------
 # 1. Resume Text Extraction
 # ---------------------------
-def extract_text_from_pdf(pdf_path):
-    text = ""
-    doc = fitz.open(pdf_path)
-    for page in doc:
-        text += page.get_text()
-    return text
-
-def extract_text_from_docx(docx_path):
-    return docx2txt.process(docx_path)
-
 def extract_resume_text(resume_path):
     ext = resume_path.split('.')[-1].lower()
-    if ext == "pdf":
-        return extract_text_from_pdf(resume_path)
-    elif ext == "docx":
-        return extract_text_from_docx(resume_path)
-    else:
+    if ext not in ("pdf", "docx"):
         print(f"[WARN] Unsupported file type: {resume_path}")
         return ""
+    return parser.extract_text(resume_path)
 
-def process_all_resumes():
+def process_all_resumes(workers=None):
+    """
+    Extracts text from every resume in RAW_RESUME_DIR on the ingestion
+    process pool. Files that fail to parse are reported and skipped.
+    """
     extracted_texts = {}
-    resume_files = glob.glob(os.path.join(RAW_RESUME_DIR, "*"))
-    for resume_file in resume_files:
-        text = extract_resume_text(resume_file)
+    resume_files = sorted(glob.glob(os.path.join(RAW_RESUME_DIR, "*")))
+    items = [(os.path.basename(resume_file), resume_file) for resume_file in resume_files]
+    for result in ingest(items, workers=workers, with_features=False):
+        if result.error:
+            print(f"[WARN] Failed to extract {result.name}: {result.error}")
+            continue
+        text = result.features["text"]
         if text.strip():
-            fname = os.path.basename(resume_file)
+            fname = result.name
             extracted_texts[fname] = text
             # Save extracted text
             out_file = os.path.join(EXTRACTED_TEXT_DIR, fname + ".txt")
@@ -63,49 +68,289 @@ def process_all_resumes():
 # ---------------------------
 # 2. Generate Resume Embeddings
 # ---------------------------
-def embed_resumes(extracted_texts):
-    embeddings = {}
+def _find_duplicates(pending, store):
+    """
+    {filename: source} for pending resumes whose text is the same as, or a
+    near-duplicate of, one already embedded (source is a store row) or one
+    earlier in this batch (source is that filename).
+    """
+    duplicate_index = dedup.DuplicateIndex(namespace="embeddings")
+    batch = {}  # text hash -> filename of the first resume in this batch with it
+    sources = {}
+    n_exact = n_near = 0
+    try:
+        for fname, (text, text_hash) in pending.items():
+            signature = dedup.minhash(text)
+            match = duplicate_index.find(text_hash, signature) if signature is not None else None
+            source = None
+            if match is not None:
+                key, _, exact = match
+                source = batch.get(key, store.row_of_hash(key))
+            if source is None:
+                batch[text_hash] = fname
+                # Indexed right away so later resumes in this batch can match it
+                duplicate_index.add([(text_hash, text_hash, signature)])
+                continue
+            sources[fname] = source
+            n_exact += exact
+            n_near += not exact
+    finally:
+        duplicate_index.close()
+    if sources:
+        print(f"[INFO] Dedup: reused {len(sources)} embeddings ({n_exact} exact, {n_near} near duplicates)")
+    return sources
+
+def embed_resumes(extracted_texts, store=None):
+    """
+    Encodes resumes that are not yet in the embedding store (by filename
+    and text hash) and appends them in one batch. Returns the store.
+
+    With DEDUP_ENABLED, a resume whose text matches (exactly or above
+    DEDUP_THRESHOLD by MinHash) one already embedded reuses its vector.
+    """
+    store = store if store is not None else EmbeddingStore()
+    pending = {}
     for fname, text in extracted_texts.items():
-        embeddings[fname] = model.encode(text, convert_to_tensor=True)
-        # Save individual embeddings
-        emb_file = os.path.join(EMBEDDINGS_DIR, fname + ".pkl")
-        with open(emb_file, "wb") as f:
-            pickle.dump(embeddings[fname], f)
-    return embeddings
+        # Hash the pipeline version too, so vectors from an older encoder are replaced
+        text_hash = hashlib.sha256(f"{PIPELINE_VERSION}\0{text}".encode("utf-8")).hexdigest()
+        row = store.row_of(fname)
+        if row is None or store.hashes[row] != text_hash:
+            pending[fname] = (text, text_hash)
+
+    if pending:
+        sources = _find_duplicates(pending, store) if DEDUP_ENABLED else {}
+        unique = [fname for fname in pending if fname not in sources]
+        encoded = dict(zip(unique, semantic.encode_texts([pending[fname][0] for fname in unique]))) if unique else {}
+        vectors = np.vstack([
+            encoded[fname] if fname in encoded
+            else encoded[sources[fname]] if isinstance(sources[fname], str)  # earlier in this batch
+            else store.vectors[sources[fname]]
+            for fname in pending
+        ])
+        store.append(pending.keys(), vectors, [text_hash for _, text_hash in pending.values()])
+    return store
 
 # ---------------------------
 # 3. Match Resumes to Job Description
 # ---------------------------
-def match_resumes(job_description, resume_embeddings):
-    job_emb = model.encode(job_description, convert_to_tensor=True)
-    similarities = {}
-    for fname, emb in resume_embeddings.items():
-        sim_score = util.cos_sim(job_emb, emb).item()
-        if sim_score >= SIMILARITY_THRESHOLD:
-            similarities[fname] = sim_score
-    # Sort by similarity descending
-    sorted_matches = sorted(similarities.items(), key=lambda x: x[1], reverse=True)
-    return sorted_matches[:TOP_N_MATCHES]
+def match_resumes(job_description, resume_embeddings, approximate=None, storage=EMBEDDING_STORAGE):
+    """
+    resume_embeddings: EmbeddingStore. Stored vectors are unit length, so
+    the exact path scores the whole memory-mapped matrix with one product
+    and keeps the top TOP_N_MATCHES via argpartition. Pools of at least
+    ANN_MIN_CORPUS resumes (or approximate=True) go through the persisted
+    IVF index instead.
+
+    storage="float16" / "int8" scores a quantized in-memory copy of the
+    matrix instead and re-ranks the best RERANK_DEPTH rows exactly.
+    """
+    job_emb = semantic.encode_query(job_description)
+    if approximate is None:
+        approximate = len(resume_embeddings) >= ANN_MIN_CORPUS
+
+    mask = resume_embeddings.live_mask
+    if approximate:
+        index = load_ivf_index(resume_embeddings, TOP_N_MATCHES)
+        if index.rebuilt and index.recall is not None:
+            print(f"[INFO] Approximate search, recall@{TOP_N_MATCHES} vs exact: {index.recall:.3f}")
+        rows, scores = index.search(resume_embeddings.vectors, job_emb, TOP_N_MATCHES, mask=mask)
+    elif storage != "float32":
+        quantized = load_quantized(resume_embeddings, storage)
+        rows, scores = quantized.search(resume_embeddings.vectors, job_emb, TOP_N_MATCHES, mask)
+    else:
+        rows, scores = exact_search(resume_embeddings.vectors, job_emb, TOP_N_MATCHES, mask)
+
+    # Rows come back sorted by similarity descending
+    return [
+        (resume_embeddings.filenames[row], float(score))
+        for row, score in zip(rows, scores)
+        if score >= SIMILARITY_THRESHOLD
+    ]
+
+def match_resumes_multi(job_descriptions, resume_embeddings, k=TOP_N_MATCHES):
+    """
+    Matches the stored resumes against several job descriptions at once.
+    job_descriptions: {job name: text}. Job embeddings come from the
+    multi_job cache, all similarities from one (jobs x resumes) product.
+    Returns {job name: [(filename, score), ...]} like match_resumes.
+    """
+    jobs = prepare_jobs(((name, text, []) for name, text in job_descriptions.items()), preprocess=False)
+    job_embs = np.vstack([job.embedding for job in jobs])
+    scores = np.asarray(job_embs @ resume_embeddings.vectors.T)
+    scores[:, ~resume_embeddings.live_mask] = -np.inf
+
+    matches = {}
+    for job, job_scores, rows in zip(jobs, scores, top_k_rows(scores, k)):
+        matches[job.name] = [
+            (resume_embeddings.filenames[row], float(job_scores[row]))
+            for row in rows
+            if job_scores[row] >= SIMILARITY_THRESHOLD
+        ]
+    return matches
 
 # ---------------------------
-# 4. Main Pipeline
+# 4. Streaming Batch Scoring
 # ---------------------------
-if __name__ == "__main__":
-    print("[INFO] Extracting resumes...")
-    extracted_texts = process_all_resumes()
-    
-    print(f"[INFO] Extracted {len(extracted_texts)} resumes. Generating embeddings...")
-    resume_embeddings = embed_resumes(extracted_texts)
-    
-    # Example job description
-    job_desc = """
-    We are looking for a Python developer with experience in Machine Learning,
-    NLP, and cloud deployment (AWS, Docker, Kubernetes). Excellent communication skills required.
+def iter_resume_files(pattern):
+    """Lazily yields resume paths from a directory or a glob pattern."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*")
+    for path in glob.iglob(pattern, recursive=True):
+        if os.path.isfile(path) and path.rsplit(".", 1)[-1].lower() in ALLOWED_EXTENSIONS:
+            yield path
+
+def load_jobs(job_files, job_skills=None):
+    """
+    Reads job descriptions from text files into multi_job.Job entries.
+    Without explicit `job_skills`, each job's key skills are the skills
+    found in its description.
+    """
+    job_specs = []
+    for path in job_files:
+        with open(path, encoding="utf-8") as f:
+            job_specs.append((os.path.basename(path), f.read(), job_skills))
+    return prepare_jobs(job_specs)
+
+def _flush_to_store(store, jobs, pending):
+    """Writes buffered (record, features) pairs to the candidate store in one batch."""
+    hashes = [text_hash(feats["text"]) for _, feats in pending]
+    store.add_candidates({"filename": record["filename"], "content_hash": h, "features": feats}
+                         for h, (record, feats) in zip(hashes, pending))
+    for job in jobs:
+        store.add_scores(job_key(job.text, job.skills),
+                         [(h, record["scores"][job.name]["score"]) for h, (record, _) in zip(hashes, pending)],
+                         job_name=job.name, job_skills=job.skills)
+    pending.clear()
+
+def score_stream(resume_paths, jobs, workers=None, store=None, store_batch=500):
     """
-    
-    print("[INFO] Matching resumes to job description...")
-    top_matches = match_resumes(job_desc, resume_embeddings)
-    
-    print("[RESULT] Top Resume Matches:")
-    for fname, score in top_matches:
-        print(f"{fname} --> Similarity: {score:.2f}")
+    Generator pipeline (parse -> features -> score) yielding one record per
+    resume as soon as it is scored. Nothing is kept per resume, so memory
+    use does not grow with the number of resumes. The TF-IDF weights are
+    fitted once on the job descriptions and then frozen, so every resume
+    is scored against the same IDF regardless of file order.
+
+    With a CandidateStore, candidates and their scores are also persisted,
+    store_batch resumes per transaction.
+    """
+    pending = []
+    try:
+        yield from _score_records(resume_paths, jobs, workers, store, store_batch, pending)
+    finally:
+        if store is not None and pending:
+            _flush_to_store(store, jobs, pending)
+
+def _score_records(resume_paths, jobs, workers, store, store_batch, pending):
+    tfidf_index = TfidfIndex().fit([], reference_documents=[job.processed for job in jobs])
+    job_vecs = tfidf_index.transform([job.processed for job in jobs])
+    job_embs = np.vstack([job.embedding for job in jobs])
+
+    items = ((os.path.basename(path), path) for path in resume_paths)
+    for result in ingest(items, workers=workers):
+        if result.error:
+            yield {"filename": result.name, "error": result.error}
+            continue
+
+        feats = result.features
+        resume_vec = tfidf_index.transform([feats["processed"]], unseen_terms=True)
+        text_similarities = (job_vecs @ resume_vec.T).toarray().ravel()
+        semantic_scores = job_embs @ feats["embedding"]
+
+        scores = {}
+        for job, text_similarity, semantic_score in zip(jobs, text_similarities, semantic_scores):
+            weighted = compute_weighted_score(feats["skills"], job.skills, text_similarity)
+            scores[job.name] = {
+                "score": round(0.7 * weighted + 0.3 * float(semantic_score), 2),
+                "weighted_score": weighted,
+                "skill_ratio": round(compute_skill_ratio(feats["skills"], job.skills), 4),
+                "text_similarity": round(float(text_similarity), 4),
+                "semantic_score": round(float(semantic_score), 4),
+            }
+
+        experience = float(feats["ner"].get("experience") or 0)
+        record = {
+            "filename": result.name,
+            **feats["ner"],
+            "experience_level": experience_level.detect_experience_level(experience),
+            "skills": feats["skills"],
+            "scores": scores,
+        }
+        if store is not None:
+            pending.append((record, feats))
+            if len(pending) >= store_batch:
+                _flush_to_store(store, jobs, pending)
+        yield record
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Score resumes against job descriptions and write one JSONL record per resume."
+    )
+    arg_parser.add_argument("resumes", nargs="?", default=RAW_RESUME_DIR,
+                            help="resume directory or glob pattern (default: RAW_RESUME_DIR)")
+    arg_parser.add_argument("-j", "--job", dest="jobs", action="append", required=True,
+                            help="job description text file; repeat for several jobs")
+    arg_parser.add_argument("--skills",
+                            help="comma-separated key skills for every job (default: skills found in each job description)")
+    arg_parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    arg_parser.add_argument("-k", "--top-k", type=int, default=TOP_N_MATCHES, help="top candidates reported per job")
+    arg_parser.add_argument("--workers", type=int, default=None, help="ingestion worker processes")
+    arg_parser.add_argument("--metrics", action="store_true",
+                            help="record stage timings and counters and export them to METRICS_FILE")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="cProfile the run into PROFILE_DIR (implies --metrics and --workers 1)")
+    arg_parser.add_argument("--db", nargs="?", const=DB_URI, default=None,
+                            help="also persist candidates and scores to this SQLite URI (default: DB_URI)")
+    args = arg_parser.parse_args(argv)
+    if args.metrics or args.profile:
+        instrumentation.enable()
+    if args.profile:
+        args.workers = 1
+
+    job_skills = [skill for skill in args.skills.split(",") if skill.strip()] if args.skills else None
+    jobs = load_jobs(args.jobs, job_skills)
+    top = {job.name: [] for job in jobs}  # min-heaps of (score, seq, filename)
+
+    store = CandidateStore(args.db) if args.db else None
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    n_scored = n_failed = 0
+    with instrumentation.profile("cli", enabled=args.profile) as profiler:
+        try:
+            stream = score_stream(iter_resume_files(args.resumes), jobs, args.workers, store)
+            for seq, record in enumerate(stream):
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                if "error" in record:
+                    n_failed += 1
+                    print(f"[WARN] Failed to process {record['filename']}: {record['error']}", file=sys.stderr)
+                    continue
+                n_scored += 1
+                for job_name, job_scores in record["scores"].items():
+                    entry = (job_scores["score"], -seq, record["filename"])
+                    if len(top[job_name]) < args.top_k:
+                        heapq.heappush(top[job_name], entry)
+                    else:
+                        heapq.heappushpop(top[job_name], entry)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+            if store is not None:
+                stream.close()  # flushes the last batch
+                store.close()
+
+    print(f"[INFO] Scored {n_scored} resumes ({n_failed} failed)", file=sys.stderr)
+    for job_name, heap in top.items():
+        print(f"[RESULT] Top matches for {job_name}:", file=sys.stderr)
+        for score, _, fname in sorted(heap, reverse=True):
+            print(f"{fname} --> Score: {score:.2f}", file=sys.stderr)
+
+    if instrumentation.is_enabled():
+        prom_path, json_path = instrumentation.export()
+        print(f"[INFO] Metrics written to {prom_path} and {json_path}", file=sys.stderr)
+    if profiler.path:
+        print(f"[INFO] Profile written to {profiler.path}", file=sys.stderr)
+
+# ---------------------------
+# 5. Main Pipeline
+# ---------------------------
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# modules/retrieval.py
+import os
+
+import numpy as np
+
+from config import ANN_N_PROBE
+
+def top_k(scores, k, mask=None):
+    """
+    Indices of the k highest scores in descending order, using
+    argpartition instead of a full sort. Rows where mask is False are skipped.
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+        k = min(k, int(np.count_nonzero(mask)))
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+def top_k_rows(scores, k):
+    """
+    Row-wise top_k for a 2-D score matrix (e.g. jobs x resumes): column
+    indices of the k highest scores in each row, in descending order.
+    """
+    scores = np.asarray(scores)
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1)
+
+def exact_search(vectors, query, k, mask=None):
+    """
+    Exact top-k by cosine similarity. `vectors` rows and `query` are
+    unit length, so one matrix-vector product scores every row.
+    Returns (rows, scores).
+    """
+    scores = np.asarray(vectors @ query, dtype=np.float32)
+    rows = top_k(scores, k, mask)
+    return rows, scores[rows]
+
+def _assign(vectors, centroids, chunk_rows=65536):
+    """Nearest centroid (by inner product) for every row, in chunks."""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk_rows):
+        block = np.asarray(vectors[start:start + chunk_rows], dtype=np.float32)
+        labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour index (inverted file over spherical
+    k-means clusters), pure NumPy.
+
+    Rows are grouped by their nearest centroid; a search scores the
+    centroids, then only the rows of the `n_probe` closest clusters.
+    The index stores row ids only; vectors are read from the embedding
+    matrix at search time.
+    """
+
+    def __init__(self, centroids, labels):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.labels = np.asarray(labels, dtype=np.int32)
+        self.recall = None
+        self.source_id = None  # EmbeddingStore.generation the index was built from
+        self.rebuilt = False  # set by load_ivf_index when it (re)built the index
+        self._build_lists()
+
+    def _build_lists(self):
+        self._order = np.argsort(self.labels, kind="stable")
+        counts = np.bincount(self.labels, minlength=len(self.centroids))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    @property
+    def n_rows(self):
+        return len(self.labels)
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, n_iter=10, sample_per_list=64, seed=0):
+        n_rows = len(vectors)
+        if n_rows == 0:
+            return cls(np.zeros((0, vectors.shape[1]), dtype=np.float32), np.zeros(0, dtype=np.int32))
+        n_lists = n_lists or max(1, int(np.sqrt(n_rows)))
+        n_lists = min(n_lists, n_rows)
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(n_rows, n_lists * sample_per_list)
+        sample_rows = np.sort(rng.choice(n_rows, size=sample_size, replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            labels = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            # Re-seed empty clusters with random sample points
+            sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        return cls(centroids, _assign(vectors, centroids))
+
+    def extend(self, vectors, start_row):
+        """Assigns rows appended to the matrix since the index was built."""
+        new_labels = _assign(vectors[start_row:], self.centroids)
+        self.labels = np.concatenate([self.labels[:start_row], new_labels])
+        self._build_lists()
+
+    def candidates(self, query, n_probe=ANN_N_PROBE):
+        """Row ids in the n_probe clusters closest to `query`."""
+        n_probe = min(n_probe, len(self.centroids))
+        lists = top_k(self.centroids @ query, n_probe)
+        if len(lists) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([self._order[self._offsets[l]:self._offsets[l + 1]] for l in lists])
+
+    def search(self, vectors, query, k, n_probe=ANN_N_PROBE, mask=None):
+        """Approximate top-k. Returns (rows, scores) like exact_search."""
+        rows = np.sort(self.candidates(query, n_probe))
+        scores = np.asarray(vectors[rows] @ query, dtype=np.float32)
+        best = top_k(scores, k, None if mask is None else mask[rows])
+        return rows[best], scores[best]
+
+    def save(self, path):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, labels=self.labels,
+                 recall=np.float32(np.nan if self.recall is None else self.recall),
+                 source_id=np.int64(-1 if self.source_id is None else self.source_id))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            index = cls(data["centroids"], data["labels"])
+            recall = float(data["recall"])
+            source_id = int(data["source_id"])
+        index.recall = None if np.isnan(recall) else recall
+        index.source_id = None if source_id < 0 else source_id
+        return index
+
+def recall_at_k(vectors, index, queries, k, n_probe=ANN_N_PROBE, mask=None):
+    """
+    Mean fraction of the exact top-k that the approximate search also
+    returns, over `queries`.
+    """
+    hits = []
+    for query in queries:
+        exact_rows, _ = exact_search(vectors, query, k, mask)
+        if len(exact_rows) == 0:
+            continue
+        approx_rows, _ = index.search(vectors, query, k, n_probe, mask)
+        hits.append(len(np.intersect1d(exact_rows, approx_rows)) / len(exact_rows))
+    return float(np.mean(hits)) if hits else 1.0
+
+def sample_queries(vectors, rows, n_queries, seed=0):
+    """
+    Held-out style queries for recall estimates: normalized midpoints of
+    random pairs of stored rows. A stored vector used as its own query is
+    always its own top hit in its own cluster, which overstates recall.
+    """
+    rng = np.random.default_rng(seed)
+    if len(rows) < 2 or n_queries <= 0:
+        return np.zeros((0, vectors.shape[1]), dtype=np.float32)
+    pairs = rng.choice(rows, size=(n_queries, 2))
+    queries = np.asarray(vectors[pairs[:, 0]], dtype=np.float32) + np.asarray(vectors[pairs[:, 1]], dtype=np.float32)
+    return queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+def load_ivf_index(store, k, n_probe=ANN_N_PROBE, n_queries=100, seed=0):
+    """
+    Loads the IVF index persisted next to the store's matrix file, builds
+    it if it is missing, and assigns rows appended since it was saved.
+    Recall@k against the exact path is measured on sample_queries()
+    whenever the index is (re)built and kept in index.recall.
+    """
+    path = os.path.splitext(store.matrix_path)[0] + ".ivf.npz"
+    vectors = store.vectors
+    # Appends keep row numbers; compaction renumbers them and bumps the generation
+    source_id = store.generation
+    index = IVFIndex.load(path) if os.path.exists(path) else None
+    if index is not None and (index.source_id != source_id or index.n_rows > store.n_rows
+                              or len(index.centroids) == 0):
+        # An index built on an empty store has no clusters to assign new rows to
+        index = None
+
+    if index is None:
+        index = IVFIndex.build(vectors, seed=seed)
+        index.source_id = source_id
+        queries = sample_queries(vectors, np.flatnonzero(store.live_mask), n_queries, seed)
+        index.recall = recall_at_k(vectors, index, queries, k, n_probe, store.live_mask) if len(queries) else None
+        index.save(path)
+        index.rebuilt = True
+    elif index.n_rows < store.n_rows:
+        index.extend(vectors, index.n_rows)
+        index.save(path)
+    return index
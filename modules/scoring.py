@@ -0,0 +1,135 @@
+# modules/scoring.py
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from modules import experience_level, highlight, ner_extraction, semantic
+from modules.matching import TfidfIndex, compute_weighted_scores
+
+class ResumeFeatureTable:
+    """
+    Job-independent features of a batch of resumes, built once per set of
+    uploads: texts, skills (also as a sparse candidate x skill matrix),
+    NER fields, embeddings and the TF-IDF rows.
+
+    `base` is a typed columnar table (categorical experience level and
+    education, float experience) whose index is the table row, so skill
+    counts, the skill gap matrix and filters for any subset of candidates
+    are computed from the row indices with vectorized operations.
+
+    score() only does the job-dependent work, as a handful of vectorized
+    operations, so editing the job description or the key skills does
+    not re-run parsing, spaCy or the encoder.
+    """
+
+    def __init__(self, names, features_list):
+        self.names = list(names)
+        self.texts = [feats["text"] for feats in features_list]
+        self.skills = [feats["skills"] for feats in features_list]
+        self.skill_spans = [feats["skill_spans"] for feats in features_list]
+        self.embeddings = np.vstack([feats["embedding"] for feats in features_list]).astype(np.float32)
+        self.tfidf = TfidfIndex().fit([feats["processed"] for feats in features_list])
+        self._build_skill_matrix()
+
+        ner = pd.DataFrame([feats["ner"] for feats in features_list])
+        ner['experience'] = ner['experience'].fillna(0).astype(float)
+        ner['education'] = ner['education'].fillna("").astype("category")
+        self.base = pd.DataFrame({
+            "Filename": self.names,
+            "Skills Found": [", ".join(skills) for skills in self.skills],
+            "Experience Level": pd.Categorical(
+                [experience_level.detect_experience_level(exp) for exp in ner['experience']],
+                categories=["Junior", "Mid-Level", "Senior"]
+            ),
+        })
+        self.base = pd.concat([self.base, ner], axis=1)
+
+        self._highlight_skills = None
+        self._highlights = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _build_skill_matrix(self):
+        self.skill_vocab = {}
+        indptr, indices = [0], []
+        for skills in self.skills:
+            for skill in skills:
+                indices.append(self.skill_vocab.setdefault(skill.lower(), len(self.skill_vocab)))
+            indptr.append(len(indices))
+        self.skill_matrix = sp.csr_matrix(
+            (np.ones(len(indices), dtype=bool), indices, indptr),
+            shape=(len(self.skills), len(self.skill_vocab))
+        )
+
+    def _rows(self, rows):
+        return self.skill_matrix if rows is None else self.skill_matrix[np.asarray(rows)]
+
+    def skill_ratios(self, job_skills):
+        """Vectorized matching.compute_skill_ratio for every resume."""
+        if not job_skills:
+            return np.zeros(len(self))
+        cols = [self.skill_vocab[skill] for skill in set(job_skills) if skill in self.skill_vocab]
+        matches = np.asarray(self.skill_matrix[:, cols].sum(axis=1)).ravel()
+        return matches / len(job_skills)
+
+    def skill_counts(self, rows=None):
+        """Number of candidates (all, or `rows`) with each skill, most common first."""
+        counts = np.asarray(self._rows(rows).sum(axis=0)).ravel()
+        counts = pd.Series(counts, index=list(self.skill_vocab), name="Count")
+        return counts[counts > 0].sort_values(ascending=False, kind="stable")
+
+    def skill_presence(self, job_skills, rows=None):
+        """
+        Dense (candidates x job_skills) 0/1 matrix for all candidates or
+        `rows`, read from the sparse skill matrix.
+        """
+        matrix = self._rows(rows)
+        presence = np.zeros((matrix.shape[0], len(job_skills)), dtype=np.int8)
+        known = [(j, self.skill_vocab[skill.lower()]) for j, skill in enumerate(job_skills)
+                 if skill.lower() in self.skill_vocab]
+        if known:
+            targets, cols = zip(*known)
+            presence[:, list(targets)] = matrix[:, list(cols)].toarray()
+        return presence
+
+    def education_mask(self, options):
+        """
+        Boolean mask over all candidates whose education mentions any of
+        `options` (ner_extraction.education_pattern). The pattern is matched
+        once per distinct education value, not once per candidate.
+        """
+        education = self.base['education']
+        if not options:
+            return np.ones(len(self), dtype=bool)
+        pattern = ner_extraction.education_pattern(options)
+        categories = education.cat.categories
+        matched = categories[categories.str.contains(pattern, regex=True)]
+        return education.isin(matched).to_numpy()
+
+    def score(self, job_desc, job_desc_processed, job_skills):
+        """
+        Candidate DataFrame with the final Score for this job. Text
+        similarity weights the resume batch and the job description
+        together, like TfidfVectorizer fitted on both.
+        """
+        text_similarities = self.tfidf.similarities(job_desc_processed)
+        weighted_scores = compute_weighted_scores(self.skill_ratios(job_skills), text_similarities)
+        semantic_scores = semantic.scores_from_embeddings(self.embeddings, job_desc)
+        df = self.base.copy()
+        df.insert(1, "Score", (0.7 * weighted_scores + 0.3 * semantic_scores).round(2))
+        return df
+
+    def highlighted(self, row, job_skills):
+        """Highlighted HTML for one resume, cached until the job skills change."""
+        job_skills = tuple(job_skills)
+        if job_skills != self._highlight_skills:
+            self._highlight_skills = job_skills
+            self._highlights = {}
+        if row not in self._highlights:
+            skills_dict = {skill.lower(): 1.0 if skill.lower() in job_skills else 0.5 for skill in self.skills[row]}
+            self._highlights[row] = highlight.highlight_skills_intensity(
+                self.texts[row], skills_dict, spans=self.skill_spans[row]
+            )
+        return self._highlights[row]
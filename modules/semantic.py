@@ -1,14 +1,54 @@
 # modules/semantic.py
-from sentence_transformers import SentenceTransformer, util
+from functools import lru_cache
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+import numpy as np
+
+from config import SEMANTIC_BATCH_SIZE
+from modules.encoding import encode_chunked
 
 def compute_semantic_score(resume_text, job_desc_text):
     """
     Returns a semantic similarity score between 0 and 1
     """
-    embeddings_resume = model.encode(resume_text, convert_to_tensor=True)
-    embeddings_job = model.encode(job_desc_text, convert_to_tensor=True)
-    
-    cosine_score = util.cos_sim(embeddings_resume, embeddings_job)
+    embeddings = encode_texts([resume_text, job_desc_text])
+    cosine_score = embeddings[0] @ embeddings[1]
     return float(cosine_score)
+
+def encode_texts(texts, batch_size=SEMANTIC_BATCH_SIZE):
+    """
+    Encodes texts into a float32 matrix of unit-length rows. Texts longer
+    than the model's token limit are encoded in windows and pooled (see
+    encoding.encode_chunked) instead of being truncated.
+    """
+    return encode_chunked(texts, batch_size=batch_size)
+
+@lru_cache(maxsize=64)
+def encode_query(text):
+    """
+    Unit-length embedding of a job description, cached so reruns with the
+    same text skip the encoder. The returned array is read-only.
+    """
+    embedding = encode_texts([text])[0]
+    embedding.setflags(write=False)
+    return embedding
+
+def scores_from_embeddings(resume_embeddings, job_desc_text):
+    """
+    Cosine scores of precomputed (unit-length) resume embeddings against
+    the job description, which is embedded once.
+    """
+    resume_embeddings = np.asarray(resume_embeddings, dtype=np.float32)
+    if len(resume_embeddings) == 0:
+        return np.zeros(0, dtype=np.float32)
+    job_emb = encode_query(job_desc_text)
+    # Rows are unit length, so the dot product is the cosine similarity
+    return resume_embeddings @ job_emb
+
+def compute_semantic_scores(resume_texts, job_desc_text, batch_size=SEMANTIC_BATCH_SIZE):
+    """
+    Batched version of compute_semantic_score.
+    The job description is embedded once and the resumes are encoded
+    `batch_size` at a time. Returns a NumPy vector of cosine scores,
+    one per resume, in input order.
+    """
+    return scores_from_embeddings(encode_texts(resume_texts, batch_size), job_desc_text)
@@ -1,11 +1,44 @@
-import spacy
+import os
 
-nlp = spacy.load("en_core_web_sm")
+from config import SKILLS_KEYWORDS, SKILLS_TAXONOMY_FILE, SKILLS_AUTOMATON_CACHE
+from modules.document import ResumeDocument
+from modules.skill_matcher import load_matcher, load_taxonomy
 
-# Example skill list
+# Example skill list (used together with config.SKILLS_KEYWORDS when no
+# taxonomy file is configured)
 SKILLS_DB = ["python", "java", "c++", "nlp", "machine learning", "data analysis", "deep learning"]
 
+_matcher = None
+
+def default_taxonomy():
+    skills = dict.fromkeys(SKILLS_DB + [skill.lower() for skill in SKILLS_KEYWORDS])
+    return {skill: [skill] for skill in skills}
+
+def get_matcher():
+    """
+    Returns the compiled skill matcher, built once from
+    config.SKILLS_TAXONOMY_FILE (or the built-in lists when it is missing).
+    """
+    global _matcher
+    if _matcher is None:
+        if os.path.exists(SKILLS_TAXONOMY_FILE):
+            taxonomy = load_taxonomy(SKILLS_TAXONOMY_FILE)
+        else:
+            taxonomy = default_taxonomy()
+        _matcher = load_matcher(taxonomy, cache_path=SKILLS_AUTOMATON_CACHE)
+    return _matcher
+
+def find_skills(text):
+    """
+    Returns SkillMatch(skill, start, end) spans for every skill in the text
+    (a string or a ResumeDocument).
+    """
+    return ResumeDocument.of(text).skill_matches
+
+def skills_from_matches(matches):
+    """Unique skill ids from find_skills matches, in order of first appearance."""
+    return list(dict.fromkeys(match.skill for match in matches))
+
 def extract_skills(text):
-    text = text.lower()
-    skills_found = [skill for skill in SKILLS_DB if skill in text]
+    skills_found = skills_from_matches(find_skills(text))
     return skills_found
@@ -0,0 +1,179 @@
+# modules/skill_matcher.py
+import hashlib
+import json
+import os
+import pickle
+from collections import deque, namedtuple
+
+SkillMatch = namedtuple("SkillMatch", ["skill", "start", "end"])
+
+# Part of the automaton signature; bump when matching or normalization
+# changes so pickled automata (and features cached with them) are rebuilt
+MATCHER_VERSION = "2"
+
+# Whitespace characters are matched as plain spaces so that multi-word
+# skills still match across line breaks and tabs.
+_WHITESPACE = str.maketrans("\t\n\r\f\v\xa0", "      ")
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+def normalize_alias(alias):
+    return " ".join(alias.lower().split())
+
+def normalize_text(text, lowered=None):
+    """
+    Lowercases text without changing its length, so offsets found in the
+    normalized text are valid offsets into the original text.
+    lowered: text.lower(), when the caller already has it.
+    """
+    lowered = text.lower() if lowered is None else lowered
+    if len(lowered) != len(text):
+        lowered = "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+    return lowered.translate(_WHITESPACE)
+
+def load_taxonomy(path):
+    """
+    Loads a skill taxonomy from a JSON file. Either a list of skills or a
+    mapping of skill id -> list of aliases, e.g.
+    {"machine learning": ["machine learning", "ml"], "python": ["python", "python3"]}
+    Skill ids and aliases are lowercased like the app's job skills; ids
+    that differ only in case are merged.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {skill: [skill] for skill in data}
+    taxonomy = {}
+    for skill, aliases in data.items():
+        skill_aliases = taxonomy.setdefault(normalize_alias(skill), [])
+        for alias in map(normalize_alias, aliases or [skill]):
+            if alias not in skill_aliases:
+                skill_aliases.append(alias)
+    return taxonomy
+
+def taxonomy_signature(taxonomy):
+    payload = json.dumps([MATCHER_VERSION, taxonomy], sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over all skill aliases.
+
+    The text is scanned once regardless of how many skills the taxonomy
+    contains. Matches must sit on word boundaries, so "java" does not
+    match inside "javascript". Skill ids are reported lowercased.
+    """
+
+    def __init__(self, taxonomy):
+        self.skills = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.signature = taxonomy_signature(taxonomy)
+        skill_ids = {}
+        for skill, aliases in taxonomy.items():
+            skill = normalize_alias(skill)
+            skill_idx = skill_ids.setdefault(skill, len(self.skills))
+            if skill_idx == len(self.skills):
+                self.skills.append(skill)
+            for alias in aliases:
+                alias = normalize_alias(alias)
+                if alias:
+                    self._add(alias, skill_idx)
+        self._build_links()
+
+    def _add(self, alias, skill_idx):
+        node = 0
+        for ch in alias:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        entry = (len(alias), skill_idx, _is_word_char(alias[0]), _is_word_char(alias[-1]))
+        if entry not in self._out[node]:
+            self._out[node] += (entry,)
+
+    def _build_links(self):
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(ch, 0)
+                out[child] += out[fail[child]]
+
+    def find_all(self, text, normalized=None):
+        """
+        All word-boundary matches, including overlapping ones, as
+        SkillMatch(skill, start, end) with offsets into `text`.
+        normalized: normalize_text(text), when the caller already has it.
+        """
+        lowered = normalize_text(text) if normalized is None else normalized
+        goto, fail, out, skills = self._goto, self._fail, self._out, self.skills
+        n = len(lowered)
+        matches = []
+        node = 0
+        for i, ch in enumerate(lowered):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, skill_idx, word_start, word_end in out[node]:
+                start = i - length + 1
+                end = i + 1
+                if word_start and start > 0 and _is_word_char(lowered[start - 1]):
+                    continue
+                if word_end and end < n and _is_word_char(lowered[end]):
+                    continue
+                matches.append(SkillMatch(skills[skill_idx], start, end))
+        return matches
+
+    def find(self, text, normalized=None):
+        """
+        Non-overlapping matches, preferring the leftmost and then the
+        longest alias (so "machine learning" wins over "learning").
+        """
+        matches = sorted(self.find_all(text, normalized), key=lambda m: (m.start, -m.end))
+        selected = []
+        last_end = 0
+        for match in matches:
+            if match.start >= last_end:
+                selected.append(match)
+                last_end = match.end
+        return selected
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+def load_matcher(taxonomy, cache_path=None):
+    """
+    Returns a compiled SkillMatcher for `taxonomy`, reusing the pickled
+    automaton at `cache_path` when it was built from the same taxonomy.
+    """
+    signature = taxonomy_signature(taxonomy)
+    if cache_path and os.path.exists(cache_path):
+        try:
+            matcher = SkillMatcher.load(cache_path)
+            if matcher.signature == signature:
+                return matcher
+        except Exception:
+            pass
+    matcher = SkillMatcher(taxonomy)
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        matcher.save(cache_path)
+    return matcher
@@ -0,0 +1,67 @@
+# tests/test_candidate_store.py
+import numpy as np
+import pytest
+
+from modules.candidate_store import CandidateStore, text_hash
+
+CANDIDATES = [
+    ("junior.pdf", "B.Tech", 1, ["Python"]),
+    ("mid.pdf", "B.Tech, M.Tech", 5, ["python", "sql"]),
+    ("senior.pdf", "PHD", 12, ["java"]),
+    ("none.pdf", "", 8, []),
+]
+
+@pytest.fixture
+def store():
+    store = CandidateStore(":memory:")
+    store.add_candidates([
+        {"filename": filename,
+         "features": {"text": filename, "processed": filename, "skills": skills,
+                      "ner": {"education": education, "experience": experience},
+                      "embedding": np.full(4, experience, dtype=np.float32)}}
+        for filename, education, experience, skills in CANDIDATES
+    ])
+    store.add_scores("job", [(text_hash(name), score) for name, score in
+                             [("junior.pdf", 0.2), ("mid.pdf", 0.9), ("senior.pdf", 0.6), ("none.pdf", 0.4)]],
+                     job_name="Backend")
+    yield store
+    store.close()
+
+def filenames(df):
+    return df["Filename"].tolist()
+
+def test_newest_first_without_a_job(store):
+    assert filenames(store.query(limit=10)) == ["none.pdf", "senior.pdf", "mid.pdf", "junior.pdf"]
+    assert store.query(limit=10).loc[0, "Score"] is None
+
+def test_job_scores_best_first_with_min_score(store):
+    df = store.query("job", min_score=0.5, limit=10)
+    assert filenames(df) == ["mid.pdf", "senior.pdf"]
+    assert df["Score"].tolist() == [0.9, 0.6]
+
+def test_experience_filter(store):
+    assert filenames(store.query("job", experience=(3, 10), limit=10)) == ["mid.pdf", "none.pdf"]
+
+def test_education_filter_is_case_insensitive_and_matches_any_degree(store):
+    assert filenames(store.query("job", education=["PhD"], limit=10)) == ["senior.pdf"]
+    assert filenames(store.query("job", education=["m.tech", "PhD"], limit=10)) == ["mid.pdf", "senior.pdf"]
+    assert filenames(store.query("job", education=["B.Tech"], experience=(0, 3), limit=10)) == ["junior.pdf"]
+
+def test_skills_and_paging(store):
+    df = store.query("job", limit=2, offset=1)
+    assert filenames(df) == ["senior.pdf", "none.pdf"]
+    assert df["Skills Found"].tolist() == ["java", ""]
+
+def test_re_adding_replaces_skills_and_degrees(store):
+    store.add_candidates([{"filename": "senior.pdf",
+                           "features": {"text": "senior.pdf", "skills": ["go"], "ner": {"education": "M.Sc"}}}])
+    assert store.count() == 4
+    assert filenames(store.query("job", education=["PhD"], limit=10)) == []
+    assert store.query("job", education=["M.Sc"], limit=10)["Skills Found"].tolist() == ["go"]
+
+def test_jobs_and_embeddings(store):
+    jobs = store.jobs()
+    assert jobs["name"].tolist() == ["Backend"] and jobs["candidates"].tolist() == [4]
+    ids = store.query(limit=10)["candidate_id"].tolist()
+    embeddings = store.embeddings(ids)
+    assert sorted(float(vector[0]) for vector in embeddings.values()) == [1, 5, 8, 12]
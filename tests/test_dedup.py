@@ -0,0 +1,49 @@
+# tests/test_dedup.py
+import numpy as np
+
+from modules import dedup
+
+BASE = " ".join(f"word{i}" for i in range(200))
+
+def test_similarity_estimates_jaccard():
+    edited = BASE.replace("word100", "changed")
+    assert dedup.similarity(dedup.minhash(BASE), dedup.minhash(BASE)) == 1.0
+    assert dedup.similarity(dedup.minhash(BASE), dedup.minhash(edited)) > 0.9
+    assert dedup.similarity(dedup.minhash(BASE), dedup.minhash("something else entirely here")) < 0.1
+    assert dedup.minhash("") is None
+
+def test_finds_exact_and_near_duplicates(tmp_path):
+    index = dedup.DuplicateIndex(path=str(tmp_path / "dedup.db"), threshold=0.8)
+    try:
+        index.add([("base", dedup.text_hash(BASE), dedup.minhash(BASE))])
+
+        assert index.find(dedup.text_hash(BASE), dedup.minhash(BASE)) == ("base", 1.0, True)
+
+        edited = BASE.replace("word100", "changed")
+        key, score, exact = index.find(dedup.text_hash(edited), dedup.minhash(edited))
+        assert (key, exact) == ("base", False) and score >= 0.8
+
+        other = " ".join(f"other{i}" for i in range(200))
+        assert index.find(dedup.text_hash(other), dedup.minhash(other)) is None
+        assert len(index) == 1
+    finally:
+        index.close()
+
+def test_namespaces_are_separate(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    features = dedup.DuplicateIndex(path=path, namespace="features")
+    store = dedup.DuplicateIndex(path=path, namespace="store")
+    try:
+        features.add([("base", dedup.text_hash(BASE), dedup.minhash(BASE))])
+        assert store.find(dedup.text_hash(BASE), dedup.minhash(BASE)) is None
+    finally:
+        features.close()
+        store.close()
+
+def test_band_layout_catches_pairs_at_the_threshold():
+    bands = dedup.bands_for(0.8, num_perm=128)
+    rows = 128 // bands
+    assert 128 % bands == 0
+    # Probability that a pair at the threshold shares at least one bucket
+    assert 1 - (1 - 0.8 ** rows) ** bands > 0.95
+    assert np.isclose(dedup.similarity(np.arange(4), np.array([0, 1, 2, 9])), 0.75)
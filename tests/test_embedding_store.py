@@ -0,0 +1,47 @@
+# tests/test_embedding_store.py
+import numpy as np
+
+from modules.embedding_store import EmbeddingStore
+
+DIM = 4
+
+def vectors(n, offset=0):
+    return np.arange(offset, offset + n * DIM, dtype=np.float32).reshape(n, DIM)
+
+def test_append_and_reopen(tmp_path):
+    store = EmbeddingStore(directory=str(tmp_path), name="test", dim=DIM)
+    assert store.append(["a.pdf", "b.pdf"], vectors(2), hashes=["ha", "hb"]) == [0, 1]
+    reopened = EmbeddingStore(directory=str(tmp_path), name="test", dim=DIM)
+    assert len(reopened) == 2 and "b.pdf" in reopened
+    np.testing.assert_array_equal(reopened.get("b.pdf"), vectors(2)[1])
+    assert reopened.row_of_hash("ha") == 0
+
+def test_replacing_a_filename_tombstones_its_old_row(tmp_path):
+    store = EmbeddingStore(directory=str(tmp_path), name="test", dim=DIM)
+    store.append(["a.pdf"], vectors(1))
+    store.append(["a.pdf"], vectors(1, offset=100))
+    assert len(store) == 1 and store.n_rows == 2
+    np.testing.assert_array_equal(store.live_mask, [False, True])
+    np.testing.assert_array_equal(store.get("a.pdf"), vectors(1, offset=100)[0])
+
+def test_delete_and_compact(tmp_path):
+    store = EmbeddingStore(directory=str(tmp_path), name="test", dim=DIM)
+    store.append(["a.pdf", "b.pdf", "c.pdf"], vectors(3), hashes=["ha", "hb", "hc"])
+    assert store.delete("b.pdf")
+    assert not store.delete("b.pdf")
+    assert "b.pdf" not in store and not store.has_hash("hb")
+
+    store.compact()
+    assert store.n_rows == 2 and store.generation == 1
+    assert store.filenames == ["a.pdf", "c.pdf"]
+    np.testing.assert_array_equal(store.vectors, vectors(3)[[0, 2]])
+
+    reopened = EmbeddingStore(directory=str(tmp_path), name="test", dim=DIM)
+    assert reopened.generation == 1 and reopened.row_of("c.pdf") == 1
+    np.testing.assert_array_equal(reopened.get("c.pdf"), vectors(3)[2])
+
+def test_compact_without_tombstones_keeps_the_generation(tmp_path):
+    store = EmbeddingStore(directory=str(tmp_path), name="test", dim=DIM)
+    store.append(["a.pdf"], vectors(1))
+    store.compact()
+    assert store.generation == 0 and store.n_rows == 1
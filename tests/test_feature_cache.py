@@ -0,0 +1,50 @@
+# tests/test_feature_cache.py
+import os
+
+import numpy as np
+
+from modules.feature_cache import FeatureCache, file_digest
+
+def make_cache(tmp_path, max_mb=1.0):
+    return FeatureCache(text_dir=str(tmp_path / "text"), embeddings_dir=str(tmp_path / "emb"),
+                        max_mb=max_mb, version="test")
+
+def test_round_trip(tmp_path):
+    cache = make_cache(tmp_path)
+    key = file_digest(b"resume")
+    cache.put(key, {"text": "hello", "skills": ["python"]}, embedding=np.ones(4))
+    features = cache.get(key)
+    assert features["skills"] == ["python"]
+    np.testing.assert_array_equal(features["embedding"], np.ones(4, dtype=np.float32))
+    assert cache.get(file_digest(b"other")) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_other_versions_are_misses(tmp_path):
+    key = file_digest(b"resume")
+    make_cache(tmp_path).put(key, {"text": "hello"})
+    cache = FeatureCache(text_dir=str(tmp_path / "text"), embeddings_dir=str(tmp_path / "emb"), version="other")
+    assert cache.get(key) is None
+
+def test_evicts_least_recently_used_first(tmp_path):
+    cache = make_cache(tmp_path, max_mb=100)
+    keys = [file_digest(str(i).encode()) for i in range(4)]
+    for age, key in zip((400, 300, 200, 100), keys):
+        cache.put(key, {"text": "x" * 1000})
+        os.utime(cache._features_path(key), (1e9 - age, 1e9 - age))
+    cache.get(keys[0])  # the oldest entry becomes the most recently used
+
+    entry_size = os.path.getsize(cache._features_path(keys[0]))
+    cache.max_bytes = cache.low_water_bytes = 2 * entry_size
+    cache.evict()
+    assert [cache.get(key) is not None for key in keys] == [True, False, False, True]
+
+def test_orphan_embeddings_are_evicted_first(tmp_path):
+    cache = make_cache(tmp_path, max_mb=100)
+    kept = file_digest(b"kept")
+    cache.put(kept, {"text": "x" * 1000})
+    orphan = file_digest(b"orphan")
+    cache.put_embedding(orphan, np.zeros(16))
+    cache.max_bytes = cache.low_water_bytes = os.path.getsize(cache._features_path(kept))
+    cache.evict()
+    assert not os.path.exists(cache._embedding_path(orphan))
+    assert cache.get(kept) is not None
@@ -0,0 +1,40 @@
+# tests/test_matching.py
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from modules.matching import TfidfIndex
+
+RESUMES = ["python developer django", "java developer spring", "python data analysis pandas"]
+JOB = "python developer kubernetes terraform aws docker golang"
+
+def sklearn_similarities(documents, query):
+    """Baseline: TfidfVectorizer fitted on the documents plus the query."""
+    matrix = TfidfVectorizer().fit_transform(documents + [query])
+    return cosine_similarity(matrix[-1], matrix[:-1]).ravel()
+
+def test_similarities_match_tfidf_vectorizer():
+    index = TfidfIndex().fit(RESUMES)
+    np.testing.assert_allclose(index.similarities(JOB), sklearn_similarities(RESUMES, JOB))
+    np.testing.assert_allclose(index.similarities(JOB), [0.2508, 0.1089, 0.0915], atol=1e-4)
+
+def test_similarities_after_incremental_adds():
+    index = TfidfIndex().fit(RESUMES[:1])
+    index.add_documents(RESUMES[1:])
+    np.testing.assert_allclose(index.similarities(JOB), sklearn_similarities(RESUMES, JOB))
+
+def test_similarities_of_selected_rows():
+    index = TfidfIndex().fit(RESUMES)
+    np.testing.assert_allclose(index.similarities(JOB, rows=[2, 0]), sklearn_similarities(RESUMES, JOB)[[2, 0]])
+
+def test_reference_documents_match_tfidf_vectorizer():
+    index = TfidfIndex().fit(RESUMES, reference_documents=[JOB])
+    vectorizer = TfidfVectorizer().fit(RESUMES + [JOB])
+    columns = [vectorizer.vocabulary_[term] for term in index.vocabulary]
+    np.testing.assert_allclose(index.matrix.toarray(), vectorizer.transform(RESUMES).toarray()[:, columns])
+
+def test_unseen_terms_stay_in_the_norm():
+    index = TfidfIndex().fit(RESUMES)
+    query = index.transform([JOB], unseen_terms=True)
+    assert np.linalg.norm(query.toarray()) < 1
+    np.testing.assert_allclose(np.linalg.norm(index.transform([JOB]).toarray()), 1)
@@ -0,0 +1,48 @@
+# tests/test_skill_matcher.py
+import json
+
+from modules.skill_matcher import SkillMatcher, load_matcher, load_taxonomy
+
+TAXONOMY = {
+    "machine learning": ["machine learning", "ml"],
+    "learning": ["learning"],
+    "java": ["java"],
+    "javascript": ["javascript", "js"],
+    "c++": ["c++"],
+}
+
+def test_matches_mixed_case_on_word_boundaries():
+    matcher = SkillMatcher(TAXONOMY)
+    text = "Senior JavaScript dev, some JAVA and C++.\nMachine\tLearning (ML)"
+    skills = [match.skill for match in matcher.find(text)]
+    assert skills == ["javascript", "java", "c++", "machine learning", "machine learning"]
+
+def test_offsets_point_into_the_original_text():
+    matcher = SkillMatcher(TAXONOMY)
+    text = "Knows Machine Learning"
+    (match,) = matcher.find(text)
+    assert text[match.start:match.end] == "Machine Learning"
+
+def test_overlapping_skills():
+    matcher = SkillMatcher(TAXONOMY)
+    text = "machine learning"
+    assert {match.skill for match in matcher.find_all(text)} == {"machine learning", "learning"}
+    assert [match.skill for match in matcher.find(text)] == ["machine learning"]
+
+def test_java_does_not_match_inside_javascript():
+    matcher = SkillMatcher(TAXONOMY)
+    assert [match.skill for match in matcher.find_all("javascript")] == ["javascript"]
+
+def test_taxonomy_ids_are_lowercased(tmp_path):
+    path = tmp_path / "taxonomy.json"
+    path.write_text(json.dumps({"Python": ["Python", "py3"], "python": ["python3"]}), encoding="utf-8")
+    taxonomy = load_taxonomy(str(path))
+    assert taxonomy == {"python": ["python", "py3", "python3"]}
+    assert [match.skill for match in SkillMatcher(taxonomy).find("PYTHON3 and Py3")] == ["python", "python"]
+
+def test_cached_automaton_is_reused_for_the_same_taxonomy(tmp_path):
+    cache_path = str(tmp_path / "automaton.pkl")
+    first = load_matcher(TAXONOMY, cache_path)
+    second = load_matcher(TAXONOMY, cache_path)
+    assert second.signature == first.signature
+    assert load_matcher({"go": ["go"]}, cache_path).skills == ["go"]